@@ -223,69 +223,74 @@ def main():
     map1.setHouseData(ringPriorities)
     theNextToDelete =   2
 
-    # keep increasing the best house
-    for i in range(MACRO_LIMIT):
+    # rebuilds go through the oracle, which rejects rings that can never fit,
+    # the rest is rebuilt by all cores at once. the workers stop when done
+    with ParallelRebuilder() as rebuilder:
+        oracle = FeasibilityOracle(rebuilder)
 
-        iterations.append(i)
+        # keep increasing the best house
+        for i in range(MACRO_LIMIT):
 
-        # smart ring increase process
-        selected = map1.selectAHouseBasedUponSomething(ringPriorities)
-        houseSelected = map1.house[selected]
-        houseSelected.changeRingsBy(1)
+            iterations.append(i)
 
-        # just continue if the map iteration has been made before
-        if i < START_AT:
-            continue
+            # smart ring increase process
+            selected = map1.selectAHouseBasedUponSomething(ringPriorities)
+            houseSelected = map1.house[selected]
+            houseSelected.changeRingsBy(1)
 
-        # keep track of counter
-        relocatecounter = 0
+            # just continue if the map iteration has been made before
+            if i < START_AT:
+                continue
 
-        # all House Boundaries Minus houseSelected
-        otherBounds = [h.boundary for h in map1.house if h is not houseSelected]
+            # keep track of counter
+            relocatecounter = 0
 
-        # if it does not fit
-        if houseSelected.ringboundary.isTouching(otherBounds):
+            # all House Boundaries Minus houseSelected
+            otherBounds = [h.boundary for h in map1.house if h is not houseSelected]
 
-            # try to rebuild the entire map, if that fails, error
-            print("rebuilding map. Iteration: {}".format(i))
-            mapIterations = map1.rebuild(LIMIT_MAP_REBUILT, LIMIT_HOUSE_RELOCATE)
-            allMapIts.append(mapIterations)
+            # if it does not fit
+            if houseSelected.ringboundary.isTouching(otherBounds):
 
-            # mapiterations ran out of steam, decide if we should quit or adapt
-            if mapIterations <= -1:
+                # try to rebuild the entire map, if that fails, error
+                print("rebuilding map. Iteration: {}".format(i))
+                mapIterations = oracle.rebuild(map1, LIMIT_MAP_REBUILT, LIMIT_HOUSE_RELOCATE)
+                allMapIts.append(mapIterations)
 
-                if theNextToDelete == 0:
-                    print("we're done!!")
-                    print(map1.houseData)
-                    return 0
+                # mapiterations ran out of steam, decide if we should quit or adapt
+                if mapIterations <= -1:
 
-                # else, exclude mansions / bungalows
-                print("excluding mansions/bungalows...")
-                map1.excludeFromHouseData(theNextToDelete)
+                    if theNextToDelete == 0:
+                        print("we're done!!")
+                        print(map1.houseData)
+                        return 0
 
-                # some annealing
-                for house in map1.house:
-                    if house.type.integer == theNextToDelete:
-                        house.changeRingsBy(-2)
+                    # else, exclude mansions / bungalows
+                    print("excluding mansions/bungalows...")
+                    map1.excludeFromHouseData(theNextToDelete)
 
-                theNextToDelete -= 1
+                    # some annealing
+                    for house in map1.house:
+                        if house.type.integer == theNextToDelete:
+                            house.changeRingsBy(-2)
 
-                # reset map iterations
-                mapIterations = 0
+                    theNextToDelete -= 1
 
-        else:
-            allMapIts.append(0)
+                    # reset map iterations
+                    mapIterations = 0
 
-        # keep track of the iteration
-        print("iterations: {}".format(i))
+            else:
+                allMapIts.append(0)
 
-        # # store map values
-        ortodoxMapValues.append(map1.calculateValue())
-        unortodoxMapValues.append(map1.calculateValueEstimate())
+            # keep track of the iteration
+            print("iterations: {}".format(i))
 
-        map1.addWater()
-        map1.saveJSON("henk.txt")
-        map1.waterBody.clear()
+            # # store map values
+            ortodoxMapValues.append(map1.calculateValue())
+            unortodoxMapValues.append(map1.calculateValueEstimate())
+
+            map1.addWater()
+            map1.saveJSON("henk.txt")
+            map1.waterBody.clear()
 
 
 
@@ -12,17 +12,33 @@ from helpers import *
 from random import randint
 import matplotlib.pyplot as plt
 import sys
+import time
 
 # choose 0, 1 or 2 to get 20, 40 or 60 houses
 SELECTED_HOUSE_COUNT = 20 # HOUSE_COUNT[0]
 
+# run seeded starts side by side instead, their number and shared time limit in seconds
+MULTI_START = False
+MULTI_STARTS = os.cpu_count()
+MULTI_START_SECONDS = 600
 
-def hillclimberTwoHouses(usedMap, maxIterations, xValues, yValues):
+# evolve a population of maps instead, its size and number of generations
+EVOLVE = False
+POPULATION_SIZE = 200
+GENERATIONS = 300
+
+
+def hillclimberTwoHouses(usedMap, maxIterations, xValues, yValues, deadline=None):
+
+    # calculate mapvalue once, swaps keep track of it from here on
+    mapValue = usedMap.calculateValue()
 
     for iteration in range(maxIterations):
 
-        # calculate mapvalue
-        mapValue = usedMap.calculateValue()
+        # stop when time is up
+        if deadline is not None and time.time() > deadline:
+            break
+
         print("mapvalue: " + str(mapValue))
 
         # get two random houses
@@ -35,10 +51,8 @@ def hillclimberTwoHouses(usedMap, maxIterations, xValues, yValues):
             if randHouseIntOne != randHouseIntTwo:
                 break
 
-        swapHouses(usedMap, randHouseIntOne, randHouseIntTwo)
-
-        # calculate value
-        mapValueAfter = usedMap.calculateValue()
+        # swap, and calculate value
+        mapValueAfter = swapHouses(usedMap, randHouseIntOne, randHouseIntTwo)
         print("mapvalue After: " + str(mapValueAfter))
 
         # check if map is valid and if not undo
@@ -48,6 +62,7 @@ def hillclimberTwoHouses(usedMap, maxIterations, xValues, yValues):
             print("you suckahh algorithm, swap it back")
 
         else:
+            mapValue = mapValueAfter
             yValues.append(mapValueAfter)
 
         print()
@@ -58,11 +73,11 @@ def hillclimberTwoHouses(usedMap, maxIterations, xValues, yValues):
 
 def swapHouses(usedMap, houseIntOne, houseIntTwo):
 
-    # swap houses
+    # swap houses, the map keeps track of the value, so return it
     coord1 = usedMap.house[houseIntOne].origin
     coord2 = usedMap.house[houseIntTwo].origin
-    usedMap.house[houseIntOne].relocate(coord2)
-    usedMap.house[houseIntTwo].relocate(coord1)
+    usedMap.commitMove(usedMap.house[houseIntOne], coord2)
+    return usedMap.commitMove(usedMap.house[houseIntTwo], coord1)
 
 
 def hillclimberRandomRelocateRecursive(usedMap, startCounter, maxIterations, relocateIterations, xValues, yValues):
@@ -117,53 +132,40 @@ def hillclimberRandomRelocateRecursive(usedMap, startCounter, maxIterations, rel
         return hillclimberRandomRelocateRecursive(usedMap, startCounter, maxIterations, relocateIterations, xValues, yValues)
 
 
-def hillclimberRandomRelocate(usedMap, maxIterations, relocateIterations, xValues, yValues):
+def hillclimberRandomRelocate(usedMap, maxIterations, xValues, yValues, deadline=None):
+
+    # calculate mapvalue once, the map keeps track of it from here on
+    mapValue = usedMap.calculateValue()
 
     for startCounter in range(maxIterations):
-        # calculate mapvalue
-        mapValue = usedMap.calculateValue()
+
+        # stop when time is up
+        if deadline is not None and time.time() > deadline:
+            break
         print("mapvalue before: " + str(mapValue))
 
         # get random house
         randHouseInt = randint(0, len(usedMap.house) - 1)
+        house = usedMap.house[randHouseInt]
 
-        # get coordinates from house randHouseInt
-        coord1 = usedMap.house[randHouseInt].origin
-
-        usedMap.house[randHouseInt].relocate("random")
-
-        # calculate value of map after new relocation
-        mapValueAfter = usedMap.calculateValue()
-
-        print(mapValueAfter)
-
-        # replaces house if necessary
-        if mapValueAfter < 0:
-            counterForRelocation = 0
-            while mapValueAfter < 0:
-                usedMap.house[randHouseInt].relocate("random")
-                mapValueAfter = usedMap.calculateValue()
-                counterForRelocation += 1
-                if counterForRelocation > relocateIterations:
-                    usedMap.house[randHouseInt].relocate(coord1)
-                    mapValueAfter = usedMap.calculateValue()
-
-        if mapValueAfter <= mapValue:
+        # move it to its best position instead of a random one, which is
+        # always valid and never worse
+        coord2 = usedMap.bestPositionFor(house)
+        if coord2 == tuple(house.origin):
             print("map is not better")
-            usedMap.house[randHouseInt].relocate(coord1)
-            mapValueAfter = usedMap.calculateValue()
-            print("new value after relocate: {}".format(str(mapValueAfter)))
+        else:
+            mapValue = usedMap.commitMove(house, coord2)
 
-        yValues.append(mapValueAfter)
+        yValues.append(mapValue)
         xValues.append(startCounter)
 
         # calculate value
-        print("mapvalue After: " + str(mapValueAfter))
+        print("mapvalue After: " + str(mapValue))
 
         print()
 
 
-def randomMapAlgorithm(tries, houseTypeList, xValues, yValues):
+def randomMapAlgorithm(tries, houseTypeList, xValues, yValues, deadline=None):
 
     # initialize counter, map, fill map and get value
     counter = 0
@@ -192,11 +194,34 @@ def randomMapAlgorithm(tries, houseTypeList, xValues, yValues):
         yValues.append(bestMapValue)
         xValues.append(counter)
 
-        # return if counter has reached the amount of tries
-        if counter >= tries:
+        # return if counter has reached the amount of tries, or time is up
+        if counter >= tries or (deadline is not None and time.time() > deadline):
             return bestMap
 
 
+def evolutionaryMapAlgorithm(generations, houseTypeList, xValues, yValues, deadline=None):
+    """
+    batched version of randomMapAlgorithm: a population of random maps is
+    scored at once, and bred by crossover and mutation. returns the best map
+    """
+    templateMap = Map()
+    fillMapWithRandomNonCollidingHouses(templateMap, houseTypeList)
+
+    population = Population(templateMap, POPULATION_SIZE)
+    population.scatter()
+    seconds = None if deadline is None else deadline - time.time()
+    population.evolve(generations, seconds)
+
+    stats = population.getStats()
+    print("{} maps in {:.1f} seconds, {:.0f} maps per second".format(
+        stats["evaluations"], stats["seconds"], stats["evaluationsPerSecond"]))
+
+    yValues.extend(population.curve)
+    xValues.extend(range(1, len(population.curve) + 1))
+
+    return population.getBest()
+
+
 def fillMapWithRandomNonCollidingHouses(usedMap, houseTypeList):
 
     # fill map with houses
@@ -204,6 +229,82 @@ def fillMapWithRandomNonCollidingHouses(usedMap, houseTypeList):
         ht = houseTypeList[i]
         usedMap.addHouse(ht, (0, 0), 0, "random_positions", "non_colliding")
 
+
+def randomHillclimbPipeline(deadline=None):
+    """
+    the algorithms of main, without the plots: the best of a set of random maps,
+    improved by relocating and then by swapping houses. returns the map and
+    its value curve, used by mainMultiStart
+    """
+    housetypes = initHouseTypes(100)
+
+    # generate correct type parameters
+    housetypelist = []
+    for ht in reversed(housetypes):
+        n = round(ht.frequency * SELECTED_HOUSE_COUNT)
+        housetypelist += [ht] * n
+
+    xValues = []
+    yValues = []
+    map1 = randomMapAlgorithm(10, housetypelist, xValues, yValues, deadline)
+    hillclimberRandomRelocate(map1, 20, xValues, yValues, deadline)
+    hillclimberTwoHouses(map1, 10, xValues, yValues, deadline)
+
+    return map1, yValues
+
+
+def mainMultiStart():
+    """
+    run MULTI_STARTS seeded starts of the pipeline at once, and keep the best map
+    """
+    runner = MultiStartRunner()
+    map1, results = runner.run(randomHillclimbPipeline, MULTI_STARTS, MULTI_START_SECONDS)
+
+    # the value curve of every start
+    for result in results:
+        print("seed {}: {} in {:.1f} seconds".format(result["seed"], result["value"], result["seconds"]))
+        plt.plot(result["curve"])
+
+    plt.ylabel("Price")
+    plt.xlabel("Iterations")
+    plt.title("Random Map Algorithm + Hillclimbers, {} starts".format(MULTI_STARTS))
+    plt.show()
+
+    map1.addWater()
+    map1.plot()
+
+    print("Total map value:", map1.calculateValue())
+
+
+def mainEvolution():
+    """
+    evolve a population of maps, and improve the best one with the hillclimbers
+    """
+    housetypes = initHouseTypes(100)
+
+    # generate correct type parameters
+    housetypelist = []
+    for ht in reversed(housetypes):
+        n = round(ht.frequency * SELECTED_HOUSE_COUNT)
+        housetypelist += [ht] * n
+
+    xValues = []
+    yValues = []
+    map1 = evolutionaryMapAlgorithm(GENERATIONS, housetypelist, xValues, yValues)
+
+    plt.plot(xValues, yValues)
+    plt.ylabel("Price")
+    plt.xlabel("Generations")
+    plt.title("Evolutionary Map Algorithm, population of {}".format(POPULATION_SIZE))
+    plt.show()
+
+    hillclimberRandomRelocate(map1, 20, [], [])
+
+    map1.addWater()
+    map1.plot()
+
+    print("Total map value:", map1.calculateValue())
+
 """
 build a correct random map
 """
@@ -238,7 +339,7 @@ def main():
 
     map1.plot()
 
-    hillclimberRandomRelocate(map1, 20, 30, xValues, yValues2)
+    hillclimberRandomRelocate(map1, 20, xValues, yValues2)
 
     map1.plot()
 
@@ -280,4 +381,9 @@ def main():
 
 
 if __name__ == "__main__":
+    if EVOLVE:
+        mainEvolution()
+    elif MULTI_START:
+        mainMultiStart()
+    else:
         main()
@@ -94,7 +94,7 @@ def cherryImproveSA(aMap):
                 moveToIdealPositionSA(house, aMap, increments, others)
             else:
                 print("greedy")
-                moveToIdealPosition(house, aMap, increments, others)
+                moveToIdealPosition(house, aMap)
 
         if simanneal:
             simanneal = False
@@ -126,10 +126,6 @@ def cherryImprove(aMap):
     (using this algorithm atleast)
     """
 
-    # use certain data to create vectors
-    # increments = [128, 64, 32, 16, 8, 4, 2, 1, 0.5]
-    increments = [16, 8, 4, 2, 1, 0.5]
-
     # keep looping until the map value wont improve anymore
     originalValue = aMap.calculateValue()
 
@@ -138,8 +134,7 @@ def cherryImprove(aMap):
         print("opnieuw")
         for house in reverse:
             # move 1 house to its move valuable position
-            others = [h.boundary for h in aMap.house if h is not house]
-            moveToIdealPosition(house, aMap, increments, others)
+            moveToIdealPosition(house, aMap)
 
         # break if the map value is not improving anymore
         newValue = aMap.calculateValue()
@@ -161,47 +156,15 @@ def cherryImprove(aMap):
             break
 
 
-def moveToIdealPosition(house, aMap, increments, otherBoundaries):
+def moveToIdealPosition(house, aMap):
     """
-    moves a house to a position that will have the best map value possible
+    moves a house to the position with the best map value possible, all other
+    houses staying where they are
     """
-    # starting value
-    start = aMap.calculateValue()
-
-    # per increment
-    for inc in increments:
-
-        # per direction option with that increment
-        up    = (0,  inc)
-        down  = (0, -inc)
-        left  = (-inc, 0)
-        right = ( inc, 0)
-        upleft    = moveCoord(up,   left)
-        upright   = moveCoord(up,   right)
-        downleft  = moveCoord(down, left)
-        downright = moveCoord(down, right)
-        direction = [up, down, left, right, upleft, upright, downleft, downright]
-        dir_length = len(direction)
-
-        # loop though all directions
-        for i in range(dir_length):
-
-            # repeat until unvalid
-            while(True):
-                origin = house.origin
-                house.move(direction[i])
-                change = aMap.calculateValue()
-
-                if (change > start and
-                    house.isWithinMap() and
-                    not house.boundary.isTouchingTight(otherBoundaries)):
-                    # take the move
-                    print(inc)
-                    start = change
-                else:
-                    # reject move
-                    house.relocate(origin)
-                    break
+    # the exact best origin, the current one if nothing beats it
+    origin = aMap.bestPositionFor(house)
+    if origin != tuple(house.origin):
+        aMap.commitMove(house, origin)
 
 def moveToIdealPositionSA(house, aMap, increments, otherBoundaries):
     """
@@ -231,11 +194,15 @@ def moveToIdealPositionSA(house, aMap, increments, otherBoundaries):
         # loop though all directions
         for i in range(dir_length):
 
+            # score the first steps in this direction at once, up to the first
+            # contact, the step after that is never valid
+            limit = 4
+            origins, valid, values = aMap.lineSearch(house, direction[i], limit)
+
             # repeat until unvalid
-            while(True):
-                origin = house.origin
-                house.move(direction[i])
-                change = aMap.calculateValue()
+            steps = 0
+            while(steps < len(values)):
+                change = values[steps]
 
                 # calcutate temperature for simAnnealing
                 temp = 0
@@ -244,9 +211,7 @@ def moveToIdealPositionSA(house, aMap, increments, otherBoundaries):
                 mapimprovement = change - start
 
                 # check if the move is valid
-                if (house.isWithinMap() and
-                    not house.boundary.isTouchingTight(otherBoundaries) and
-                    change is not -1):
+                if valid[steps]:
                     # check if the move improves the map
                     if mapimprovement > 0:
                         temp = 1
@@ -261,11 +226,20 @@ def moveToIdealPositionSA(house, aMap, increments, otherBoundaries):
                     # accept move
                     print(inc)
                     start = change
+                    steps += 1
+
+                    # score further if all scored steps are taken
+                    if steps == limit:
+                        limit *= 2
+                        origins, valid, values = aMap.lineSearch(house, direction[i], limit)
                 else:
                     # do not accept move
-                    house.relocate(origin)
                     break
 
+            # move the house to the last accepted step
+            if steps > 0:
+                aMap.commitMove(house, origins[steps - 1])
+
 def printAt(aMap, mapVal, value):
     if mapVal > value:
         aMap.plot()
@@ -4,6 +4,10 @@ from dependencies.helpers import *
 fileName = "33127104_cherrymover"
 dirPath = "C:\\Users\\Jos\\GitHub\\UrbanPlanning\\Rhino\\json"
 
+# improve on all cores instead, with the island model or with parallel tempering
+ISLANDS = False
+TEMPERING = False
+
 def main():
 
     # get arguments
@@ -18,7 +22,14 @@ def main():
     map1.plot()
     map1.waterBody.clear()
 
-    cherryImprove(map1)
+    print("value before: {}".format(map1.calculateValue()))
+    if ISLANDS:
+        map1 = islandImprove(map1)
+    elif TEMPERING:
+        map1 = temperingImprove(map1)
+    else:
+        annealImprove(map1)
+    print("value after: {}".format(map1.calculateValue()))
 
     # show result
     map1.addWater()
@@ -69,6 +80,54 @@ def simAnnealing(temperature):
     else:
         return False
 
+def annealImprove(aMap, steps=200000):
+    """
+    improve the house locations of 'aMap' with the annealing engine: metropolis
+    acceptance, a temperature that cools down and reheats when stuck, and
+    incremental evaluation of every move
+    """
+    schedule = ReheatingSchedule(start=200000, alpha=0.9995, minimum=1000, patience=5000)
+    annealer = Annealer(aMap, [TranslateMove(8), TranslateMove(1), SwapMove()], schedule, weights=[4, 4, 1])
+    best = annealer.run(steps)
+
+    # evaluations per second, to compare with the stepmover
+    stats = annealer.getStats()
+    print("annealed to {} in {} steps, {:.0f} evaluations per second, {} reheats".format(
+        best, stats["steps"], stats["evaluationsPerSecond"], schedule.reheats))
+
+    return best
+
+def islandImprove(aMap, epochs=100):
+    """
+    improve the house locations of 'aMap' on all cores at once: every island
+    anneals its own maps with the moves of the stepmover, and the best maps
+    migrate in between islands. returns the best map found
+    """
+    schedule = GeometricSchedule(start=200000, alpha=0.999, minimum=1000)
+    model = IslandModel([StepMove(), SwapMove()], schedule, weights=[9, 1])
+    bestMap, results = model.run(aMap, epochs)
+
+    for result in results:
+        print("island {}: {}".format(result["island"], result["value"]))
+
+    return bestMap
+
+def temperingImprove(aMap, rounds=200):
+    """
+    improve the house locations of 'aMap' with replica exchange: a replica per
+    temperature, all with the moves of the stepmover, swapping temperatures in
+    between rounds so stuck maps can climb out of their local optimum
+    """
+    tempering = ParallelTempering([StepMove(), SwapMove()], [1000, 20000, 60000, 120000, 200000],
+                                  weights=[9, 1])
+    bestMap, results = tempering.run(aMap, rounds)
+
+    stats = tempering.getStats()
+    print("swap acceptance: {}".format(["{:.2f}".format(rate) for rate in stats["swapAcceptance"]]))
+    print("steps per second: {}".format(["{:.0f}".format(rate) for rate in stats["stepsPerSecond"]]))
+
+    return bestMap
+
 def cherryImproveSA(aMap):
     """
     keeps improving the house locations of 'aMap', until they cant be improved anymore
@@ -94,7 +153,7 @@ def cherryImproveSA(aMap):
                 moveToIdealPositionSA(house, aMap, increments, others)
             else:
                 print("greedy")
-                moveToIdealPosition(house, aMap, increments, others)
+                moveToIdealPosition(house, aMap)
 
         if simanneal:
             simanneal = False
@@ -126,10 +185,6 @@ def cherryImprove(aMap):
     (using this algorithm atleast)
     """
 
-    # use certain data to create vectors
-    # increments = [128, 64, 32, 16, 8, 4, 2, 1, 0.5]
-    increments = [16, 8, 4, 2, 1, 0.5]
-
     # keep looping until the map value wont improve anymore
     originalValue = aMap.calculateValue()
 
@@ -138,8 +193,7 @@ def cherryImprove(aMap):
         print("opnieuw")
         for house in reverse:
             # move 1 house to its move valuable position
-            others = [h.boundary for h in aMap.house if h is not house]
-            moveToIdealPosition(house, aMap, increments, others)
+            moveToIdealPosition(house, aMap)
 
         # break if the map value is not improving anymore
         newValue = aMap.calculateValue()
@@ -161,47 +215,15 @@ def cherryImprove(aMap):
             break
 
 
-def moveToIdealPosition(house, aMap, increments, otherBoundaries):
+def moveToIdealPosition(house, aMap):
     """
-    moves a house to a position that will have the best map value possible
+    moves a house to the position with the best map value possible, all other
+    houses staying where they are
     """
-    # starting value
-    start = aMap.calculateValue()
-
-    # per increment
-    for inc in increments:
-
-        # per direction option with that increment
-        up    = (0,  inc)
-        down  = (0, -inc)
-        left  = (-inc, 0)
-        right = ( inc, 0)
-        upleft    = moveCoord(up,   left)
-        upright   = moveCoord(up,   right)
-        downleft  = moveCoord(down, left)
-        downright = moveCoord(down, right)
-        direction = [up, down, left, right, upleft, upright, downleft, downright]
-        dir_length = len(direction)
-
-        # loop though all directions
-        for i in range(dir_length):
-
-            # repeat until unvalid
-            while(True):
-                origin = house.origin
-                house.move(direction[i])
-                change = aMap.calculateValue()
-
-                if (change > start and
-                    house.isWithinMap() and
-                    not house.boundary.isTouchingTight(otherBoundaries)):
-                    # take the move
-                    print(inc)
-                    start = change
-                else:
-                    # reject move
-                    house.relocate(origin)
-                    break
+    # the exact best origin, the current one if nothing beats it
+    origin = aMap.bestPositionFor(house)
+    if origin != tuple(house.origin):
+        aMap.commitMove(house, origin)
 
 def moveToIdealPositionSA(house, aMap, increments, otherBoundaries):
     """
@@ -231,11 +253,15 @@ def moveToIdealPositionSA(house, aMap, increments, otherBoundaries):
         # loop though all directions
         for i in range(dir_length):
 
+            # score the first steps in this direction at once, up to the first
+            # contact, the step after that is never valid
+            limit = 4
+            origins, valid, values = aMap.lineSearch(house, direction[i], limit)
+
             # repeat until unvalid
-            while(True):
-                origin = house.origin
-                house.move(direction[i])
-                change = aMap.calculateValue()
+            steps = 0
+            while(steps < len(values)):
+                change = values[steps]
 
                 # calcutate temperature for simAnnealing
                 temp = 0
@@ -244,9 +270,7 @@ def moveToIdealPositionSA(house, aMap, increments, otherBoundaries):
                 mapimprovement = change - start
 
                 # check if the move is valid
-                if (house.isWithinMap() and
-                    not house.boundary.isTouchingTight(otherBoundaries) and
-                    change is not -1):
+                if valid[steps]:
                     # check if the move improves the map
                     if mapimprovement > 0:
                         temp = 1
@@ -261,11 +285,20 @@ def moveToIdealPositionSA(house, aMap, increments, otherBoundaries):
                     # accept move
                     print(inc)
                     start = change
+                    steps += 1
+
+                    # score further if all scored steps are taken
+                    if steps == limit:
+                        limit *= 2
+                        origins, valid, values = aMap.lineSearch(house, direction[i], limit)
                 else:
                     # do not accept move
-                    house.relocate(origin)
                     break
 
+            # move the house to the last accepted step
+            if steps > 0:
+                aMap.commitMove(house, origins[steps - 1])
+
 def printAt(aMap, mapVal, value):
     if mapVal > value:
         aMap.plot()
@@ -92,112 +92,121 @@ def main():
     # loop through all ringPriorities
     fig, ax = plt.subplots()
 
-    for distID, rp in enumerate(ringPriorities):
-
-        best_score = 0
-
-        # make a new map
-        map1 = Map()
-
-        # fill map for first time
-        for i in range(SELECTED_HOUSE_COUNT):
-
-            # get current housetype
-            ht = housetypelist[i]
-            map1.addHouse(ht, (0,0), 0, "random_positions", "non_colliding")
-
-        # instanciate ringdata values
-        map1.setHouseData(rp)
-        theNextToDelete =   2
-
-        # plottable data
-        ortodoxMapValues = []
-        unortodoxMapValues = []
-        allMapIts = []
-        iterations = []
-
-        # keep increasing the best house
-        for i in range(MACRO_LIMIT):
-
-            # smart ring increase process
-            selected = map1.selectAHouseBasedUponSomething(rp)
-            houseSelected = map1.house[selected]
-            houseSelected.changeRingsBy(1)
-
-            # just continue if the map iteration has been made before
-            if i < START_AT:
-                continue
-
-            # keep track of counter
-            relocatecounter = 0
-
-            # all House Boundaries Minus houseSelected
-            otherBounds = [h.boundary for h in map1.house if h is not houseSelected]
-
-            # if it does not fit
-            if houseSelected.ringboundary.isTouching(otherBounds):
-
-                # try to rebuild the entire map, if that fails, error
-                print("rebuilding map. Iteration: {}".format(i))
-                mapIterations = map1.rebuild(LIMIT_MAP_REBUILT, LIMIT_HOUSE_RELOCATE)
-                allMapIts.append(mapIterations)
-
-                # mapiterations ran out of steam, decide if we should quit or adapt
-                if mapIterations <= -1:
-
-                    # fix the map, then continue
-                    map1.rebuild(LIMIT_MAP_REBUILT * 2, LIMIT_HOUSE_RELOCATE)
-
-                    break
-
-                    # if theNextToDelete == 0:
-                    #     print("we're done!!")
-                    #
-                    #     # make sure the map quits with a valid map
-                    #     map1.rebuild(LIMIT_MAP_REBUILT * 10, LIMIT_HOUSE_RELOCATE)
-                    #     break
-                    #
-                    # # else, exclude mansions / bungalows
-                    # print("excluding mansions/bungalows...")
-                    # map1.excludeFromHouseData(theNextToDelete)
-                    # #
-                    # # some annealing
-                    # for house in map1.house:
-                    #     if house.type.integer == theNextToDelete:
-                    #         house.changeRingsBy(-2)
-                    #
-                    # theNextToDelete -= 1
-
-                    # reset map iterations
-                    mapIterations = 0
-
-            else:
-                allMapIts.append(0)
-
-            # keep track of the iteration
-            print("iterations: {}".format(i))
-
-            # # store map values
-            mapVal = map1.calculateValue()
-            ortodoxMapValues.append(mapVal)
-            unortodoxMapValues.append(map1.calculateValueEstimate())
-            iterations.append(i)
-
-            # update for rhino visualisation
-            # map1.addWater()
-            map1.saveJSON(jsonPATH, jsonNAME)
-            # map1.waterBody.clear()
-
-            # if the map
-            if mapVal > global_best_score:
-                global_best_score = mapVal
-                print("HIGH SCORE: {}".format(global_best_score))
-                map1.saveJSON(jsonPATH, "bestestst.txt")
-
-        # plot the data
-        plt.plot(iterations, ortodoxMapValues, color[distID])
-        plt.plot(iterations, unortodoxMapValues, colorstriped[distID])
-        # map1.plot()
+    # rebuilds are done by all cores at once, one pool for all ringPriorities.
+    # the workers stop when done
+    with ParallelRebuilder() as rebuilder:
+        for distID, rp in enumerate(ringPriorities):
+
+            best_score = 0
+
+            # make a new map
+            map1 = Map()
+
+            # fill map for first time
+            for i in range(SELECTED_HOUSE_COUNT):
+
+                # get current housetype
+                ht = housetypelist[i]
+                map1.addHouse(ht, (0,0), 0, "random_positions", "non_colliding")
+
+            # instanciate ringdata values
+            map1.setHouseData(rp)
+            theNextToDelete =   2
+
+            # rebuilds go through the oracle, which rejects rings that can never fit
+            oracle = FeasibilityOracle(rebuilder)
+
+            # plottable data
+            ortodoxMapValues = []
+            unortodoxMapValues = []
+            allMapIts = []
+            iterations = []
+
+            # keep increasing the best house
+            for i in range(MACRO_LIMIT):
+
+                # smart ring increase process
+                selected = map1.selectAHouseBasedUponSomething(rp)
+                houseSelected = map1.house[selected]
+                houseSelected.changeRingsBy(1)
+
+                # just continue if the map iteration has been made before
+                if i < START_AT:
+                    continue
+
+                # keep track of counter
+                relocatecounter = 0
+
+                # all House Boundaries Minus houseSelected
+                otherBounds = [h.boundary for h in map1.house if h is not houseSelected]
+
+                # if it does not fit
+                if houseSelected.ringboundary.isTouching(otherBounds):
+
+                    # try to rebuild the entire map, if that fails, error
+                    print("rebuilding map. Iteration: {}".format(i))
+                    mapIterations = oracle.rebuild(map1, LIMIT_MAP_REBUILT, LIMIT_HOUSE_RELOCATE)
+                    allMapIts.append(mapIterations)
+
+                    # mapiterations ran out of steam, decide if we should quit or adapt
+                    if mapIterations <= -1:
+
+                        # take the ring back, and restore a layout of the rings that did fit,
+                        # from the cache or by the rebuilder, if the failed rebuild moved the houses
+                        houseSelected.changeRingsBy(-1)
+                        if not map1.areConstraintsSatisfied():
+                            oracle.rebuild(map1, LIMIT_MAP_REBUILT * 2, LIMIT_HOUSE_RELOCATE)
+
+                        break
+
+                        # if theNextToDelete == 0:
+                        #     print("we're done!!")
+                        #
+                        #     # make sure the map quits with a valid map
+                        #     map1.rebuild(LIMIT_MAP_REBUILT * 10, LIMIT_HOUSE_RELOCATE)
+                        #     break
+                        #
+                        # # else, exclude mansions / bungalows
+                        # print("excluding mansions/bungalows...")
+                        # map1.excludeFromHouseData(theNextToDelete)
+                        # #
+                        # # some annealing
+                        # for house in map1.house:
+                        #     if house.type.integer == theNextToDelete:
+                        #         house.changeRingsBy(-2)
+                        #
+                        # theNextToDelete -= 1
+
+                        # reset map iterations
+                        mapIterations = 0
+
+                else:
+                    allMapIts.append(0)
+
+                # keep track of the iteration
+                print("iterations: {}".format(i))
+
+                # # store map values
+                mapVal = map1.calculateValue()
+                ortodoxMapValues.append(mapVal)
+                unortodoxMapValues.append(map1.calculateValueEstimate())
+                iterations.append(i)
+
+                # update for rhino visualisation
+                # map1.addWater()
+                map1.saveJSON(jsonPATH, jsonNAME)
+                # map1.waterBody.clear()
+
+                # if the map
+                if mapVal > global_best_score:
+                    global_best_score = mapVal
+                    print("HIGH SCORE: {}".format(global_best_score))
+                    map1.saveJSON(jsonPATH, "bestestst.txt")
+
+            # plot the data
+            plt.plot(iterations, ortodoxMapValues, color[distID])
+            plt.plot(iterations, unortodoxMapValues, colorstriped[distID])
+            # map1.plot()
 
     plt.show()
 
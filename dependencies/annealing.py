@@ -0,0 +1,314 @@
+
+"""
+NAME    annealing.py
+
+AUTHOR  Jos Feenstra
+        Tara Elsen
+        Christiaan Wewer
+
+DESC    contains the simulated annealing engine:
+        - GeometricSchedule
+        - ReheatingSchedule
+        - BudgetSchedule
+        - TranslateMove
+        - StepMove
+        - SwapMove
+        - RingMove
+        - Annealer
+
+NOTE    a move proposes a change, returns the change in value it would cause,
+        and is then either accepted or rejected. moves use the incremental
+        evaluation of the map (valueDelta, commitMove), so one step costs O(n)
+        instead of a full calculateValue.
+
+        the map value does not depend on rings, so RingMove only makes sense
+        when annealing calculateValueEstimate, the guaranteed minimal value.
+
+"""
+# dependent upon the methods, constances and libaries in helpers
+from helpers import *
+
+import time
+from math import exp
+
+################################################################################
+
+class GeometricSchedule(object):
+    """
+    temperature = start * alpha ^ step, never lower than minimum
+
+    Methods:
+    reset()                                 # back to the start temperature
+    next(accepted, newBest)                 # one step has been taken
+    isDone()                                # true if the schedule wants to stop
+    """
+    def __init__(self, start, alpha=0.999, minimum=1.0):
+        self.start = start
+        self.alpha = alpha
+        self.minimum = minimum
+        self.reset()
+
+    def reset(self):
+        self.step = 0
+        self.temperature = self.start
+
+    def next(self, accepted, newBest):
+        self.step += 1
+        self.temperature = max(self.temperature * self.alpha, self.minimum)
+
+    def isDone(self):
+        return False
+
+class ReheatingSchedule(GeometricSchedule):
+    """
+    geometric cooling, but if the best value has not improved for patience
+    steps, the temperature jumps back up to reheat * the start temperature
+    """
+    def __init__(self, start, alpha=0.999, minimum=1.0, patience=2000, reheat=0.5):
+        self.patience = patience
+        self.reheat = reheat
+        GeometricSchedule.__init__(self, start, alpha, minimum)
+
+    def reset(self):
+        GeometricSchedule.reset(self)
+        self.sinceBest = 0
+        self.reheats = 0
+
+    def next(self, accepted, newBest):
+        GeometricSchedule.next(self, accepted, newBest)
+        self.sinceBest = 0 if newBest else self.sinceBest + 1
+
+        if self.sinceBest >= self.patience:
+            self.temperature = self.start * self.reheat
+            self.sinceBest = 0
+            self.reheats += 1
+
+class BudgetSchedule(GeometricSchedule):
+    """
+    cools from start down to end in exactly budget steps, then stops
+    """
+    def __init__(self, start, end, budget):
+        self.end = end
+        self.budget = budget
+        GeometricSchedule.__init__(self, start, (end / start) ** (1 / budget), end)
+
+    def isDone(self):
+        return self.step >= self.budget
+
+################################################################################
+
+class TranslateMove(object):
+    """
+    move a random house by a random offset of at most maxStep meters along x and y
+    """
+    def __init__(self, maxStep=8):
+        self.maxStep = maxStep
+
+    def propose(self, aMap):
+        self.house = choice(aMap.house)
+        ticks = int(self.maxStep * TICKS_PER_METER)
+        ht = self.house.type
+        x = self.house.origin[0] + randint(-ticks, ticks) / TICKS_PER_METER
+        y = self.house.origin[1] + randint(-ticks, ticks) / TICKS_PER_METER
+        self.origin = (min(max(x, ht.xLower), ht.xUpper), min(max(y, ht.yLower), ht.yUpper))
+
+        return aMap.valueDelta(self.house, self.origin)
+
+    def accept(self, aMap):
+        aMap.commitMove(self.house, self.origin)
+
+    def reject(self, aMap):
+        pass
+
+class StepMove(object):
+    """
+    the move of the stepmover: a random house takes one step of a random
+    increment in one of the 8 directions
+    """
+    DIRECTIONS = ((0, 1), (0, -1), (-1, 0), (1, 0), (-1, 1), (1, 1), (-1, -1), (1, -1))
+
+    def __init__(self, increments=(16, 8, 4, 2, 1, 0.5)):
+        self.increments = increments
+
+    def propose(self, aMap):
+        self.house = choice(aMap.house)
+        inc = choice(self.increments)
+        dx, dy = choice(self.DIRECTIONS)
+        self.origin = (self.house.origin[0] + dx * inc, self.house.origin[1] + dy * inc)
+
+        # a step out of the bounds of the house type is never valid
+        ht = self.house.type
+        if not (ht.xLower <= self.origin[0] <= ht.xUpper and ht.yLower <= self.origin[1] <= ht.yUpper):
+            return -inf
+
+        return aMap.valueDelta(self.house, self.origin)
+
+    def accept(self, aMap):
+        aMap.commitMove(self.house, self.origin)
+
+    def reject(self, aMap):
+        pass
+
+class SwapMove(object):
+    """
+    swap the origins of two random houses of a different type
+    """
+    def propose(self, aMap):
+        self.first = choice(aMap.house)
+        others = [house for house in aMap.house if house.type is not self.first.type]
+        if not others:
+            self.second = None
+            return -inf
+        self.second = choice(others)
+        self.origins = (tuple(self.first.origin), tuple(self.second.origin))
+
+        # both houses should stay within the bounds of their type
+        for house, (x, y) in ((self.first, self.origins[1]), (self.second, self.origins[0])):
+            ht = house.type
+            if not (ht.xLower <= x <= ht.xUpper and ht.yLower <= y <= ht.yUpper):
+                self.second = None
+                return -inf
+
+        # the first house lands on top of the second in between, the table does not mind
+        delta = aMap.valueDelta(self.first, self.origins[1])
+        aMap.commitMove(self.first, self.origins[1])
+        delta += aMap.valueDelta(self.second, self.origins[0])
+        aMap.commitMove(self.second, self.origins[0])
+
+        return delta
+
+    def accept(self, aMap):
+        pass
+
+    def reject(self, aMap):
+        if self.second is None:
+            return
+        aMap.commitMove(self.second, self.origins[1])
+        aMap.commitMove(self.first, self.origins[0])
+
+class RingMove(object):
+    """
+    add or remove one ring of a random house. a ring may not reach the body of
+    another house. the change is in calculateValueEstimate, not calculateValue
+    """
+    def propose(self, aMap):
+        self.house = choice(aMap.house)
+        self.increment = choice((-1, 1))
+        house = self.house
+        if house.addRings + self.increment < 0:
+            return -inf
+
+        # a larger ring should only cover the body of its own house
+        if self.increment > 0:
+            width = house.ring.ringWidth + self.increment
+            ring = Rectangle((house.origin[0] - width, house.origin[1] - width),
+                             house.type.width + 2 * width, house.type.height + 2 * width)
+            own = aMap.countOccupied(house.boundary, ("house",))
+            if aMap.countOccupied(ring, ("house",)) > own:
+                return -inf
+
+        rings = np.array([house.addRings, house.addRings + self.increment])
+        before, after = HouseType.valueForRings(house.type.integer, rings).tolist()
+        return after - before
+
+    def accept(self, aMap):
+        self.house.changeRingsBy(self.increment)
+
+    def reject(self, aMap):
+        pass
+
+################################################################################
+
+class Annealer(object):
+    """
+    simulated annealing with Metropolis acceptance: a move which improves the
+    map is always accepted, a move which costs delta with chance exp(-delta / T).
+    the best map seen is restored at the end.
+
+    Methods:
+    run(maxSteps, maxTime, reset, restore)  # anneal, returns the best value
+    getStats()                              # steps, acceptance rate and evaluations per second of the last run
+    """
+    def __init__(self, aMap, moves, schedule, weights=None, objective=None):
+        self.map = aMap
+        self.moves = moves
+        self.weights = weights
+        self.schedule = schedule
+
+        # the value moves report the change of, calculateValue by default
+        self.objective = objective if objective is not None else Map.calculateValue
+
+        self.steps = 0
+        self.accepted = 0
+        self.seconds = 0.0
+
+    def snapshot(self):
+        return ([tuple(house.origin) for house in self.map.house],
+                [house.addRings for house in self.map.house])
+
+    def restore(self, snapshot):
+        origins, rings = snapshot
+        self.map.setOrigins(self.map.house, np.array(origins, dtype=float))
+        self.map.setRings(self.map.house, rings)
+
+    def run(self, maxSteps=100000, maxTime=None, reset=True, restore=True):
+        """
+        anneal until the schedule is done, maxSteps have been taken, or maxTime
+        seconds have passed. the map ends up in the best state found, or where
+        the walk ended without restore (self.value, self.best and self.bestState
+        tell where that is). without reset, the schedule goes on where it was
+        """
+        if reset:
+            self.schedule.reset()
+        self.steps = 0
+        self.accepted = 0
+        start = time.time()
+
+        value = self.objective(self.map)
+        best, bestState = value, self.snapshot()
+
+        while self.steps < maxSteps and not self.schedule.isDone():
+            if maxTime is not None and time.time() - start > maxTime:
+                break
+
+            # propose, and judge the change
+            if self.weights is None:
+                move = choice(self.moves)
+            else:
+                move = self.moves[np.searchsorted(np.cumsum(self.weights), random() * sum(self.weights), side="right")]
+            delta = move.propose(self.map)
+            self.steps += 1
+
+            # moves towards an invalid map are never accepted
+            accept = delta > -inf and value + delta >= 0
+            if accept and delta < 0:
+                accept = random() < exp(delta / self.schedule.temperature)
+
+            newBest = False
+            if accept:
+                move.accept(self.map)
+                value += delta
+                self.accepted += 1
+                if value > best:
+                    best, bestState = value, self.snapshot()
+                    newBest = True
+            else:
+                move.reject(self.map)
+
+            self.schedule.next(accept, newBest)
+
+        self.seconds = time.time() - start
+        self.value, self.best, self.bestState = value, best, bestState
+        if restore:
+            self.restore(bestState)
+            self.value = best
+
+        return best
+
+    def getStats(self):
+        return {"steps": self.steps,
+                "acceptance": self.accepted / max(self.steps, 1),
+                "seconds": self.seconds,
+                "evaluationsPerSecond": self.steps / max(self.seconds, 1e-9)}
+
+################################################################################
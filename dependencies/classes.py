@@ -23,6 +23,9 @@ class HouseType(object):
     """
     Housetype Class
     """
+    # all instantiated house types, by integer, used by the vectorized ring lookups
+    byInteger = {}
+
     def __init__(self, aName, aFrequency, aValue, aSite, aBaseRing, aRingIncrement, MaxRingIt, aColour, anInteger):
 
         # base values
@@ -46,46 +49,9 @@ class HouseType(object):
         if self.baseRing - 1 < 0:
             raise print("ERROR: Ring Creation Error")
 
-        # instanciate cummulative variables
-        cumArea        = self.area
-        cumValue       = self.value
-        cumLandValue   = self.landValue
-
-        # fill ring list with Ring objects
-        class Ring:
-            pass
-        self.ring = list()
-
-        # iterate starting from basering, ending at Max Ring Iteration
-        for ringWidth in range(self.baseRing, MaxRingIt):
-
-            # turn r into Ring object
-            r = Ring()
-
-            # calc land value in  / m2, and calc other attributes
-            r.ringWidth = ringWidth                  # synoniem
-            r.x = ringWidth * 2 + self.width
-            r.y = ringWidth * 2 + self.height
-            r.area = r.x * r.y - cumArea
-
-            # the first ring is part of the house, so it yields no value
-            r.value = 0
-            if ringWidth != self.baseRing:
-                r.value = self.ringValue
-            r.landValue = round(r.value / r.area, 1)
-
-            # increase the cummilative values, and add the current values to r
-            cumArea += r.area
-            r.cumArea = cumArea
-
-            cumValue += r.value
-            r.cumValue = cumValue
-
-            cumLandValue = round(cumValue / cumArea)
-            r.cumLandValue = cumLandValue
-
-            # add Ring object r to list ring
-            self.ring.append(r)
+        # ring table, starting from basering, computed up till Max Ring Iteration,
+        # and extended whenever a larger ring is asked for
+        self.ring = RingTable(self, MaxRingIt - self.baseRing)
 
         # calc house's lower- and upperbounds of x and y coordinates
         self.xLower = self.ring[0].ringWidth
@@ -93,6 +59,30 @@ class HouseType(object):
         self.xUpper = AREA[0] - self.ring[0].ringWidth - self.width
         self.yUpper = AREA[1] - self.ring[0].ringWidth - self.height
 
+        HouseType.byInteger[self.integer] = self
+
+    @staticmethod
+    def lookupRings(column, typeIds, rings):
+        """
+        vectorized ring table lookup: return ring[rings].column for every pair
+        of house type integer and ring index in the arrays typeIds and rings
+        """
+        typeIds, rings = np.broadcast_arrays(np.asarray(typeIds), np.asarray(rings))
+        result = np.zeros(typeIds.shape)
+        for integer, houseType in HouseType.byInteger.items():
+            selected = typeIds == integer
+            if selected.any():
+                result[selected] = houseType.ring.getColumn(column, rings[selected])
+
+        return result
+
+    @staticmethod
+    def valueForRings(typeIds, rings):
+        """
+        return the cummulative value of houses of typeIds with rings additional rings
+        """
+        return HouseType.lookupRings("cumValue", typeIds, rings).astype(np.int64)
+
     def printRingInfo(self):
         print()
         print(self.name)
@@ -104,46 +94,182 @@ class HouseType(object):
 
 ################################################################################
 
+# a single row of a ring table
+Ring = namedtuple("Ring", ["ringWidth", "x", "y", "area", "value", "landValue",
+                           "cumArea", "cumValue", "cumLandValue"])
+
+class RingTable(object):
+    """
+    the rings of a house type, stored as numpy columns. ring[0] is the base ring.
+
+    columns are calculated in closed form, every ring adds ringValue to the value
+    and its (x * y) - (previous x * y) to the area. the table doubles its length
+    whenever a ring beyond its length is asked for, Ring rows are only made on access.
+    """
+    COLUMNS = Ring._fields
+
+    def __init__(self, houseType, length):
+        self.type = houseType
+        self.rows = {}
+        self.extend(max(length, 1))
+
+    def extend(self, length):
+        """
+        (re)calculate all columns for the first |length| rings
+        """
+        ht = self.type
+        self.length = length
+
+        # the first ring is part of the house, so it yields no value
+        index = np.arange(length)
+        self.ringWidth = ht.baseRing + index
+        self.x = self.ringWidth * 2 + ht.width
+        self.y = self.ringWidth * 2 + ht.height
+        self.cumArea = self.x * self.y
+        self.area = self.cumArea - np.concatenate(([ht.area], self.cumArea[:-1]))
+        self.value = np.where(index == 0, 0, ht.ringValue)
+        self.landValue = np.round(self.value / self.area, 1)
+        self.cumValue = ht.value + index * ht.ringValue
+        self.cumLandValue = np.round(self.cumValue / self.cumArea)
+
+    def getColumn(self, column, rings):
+        """
+        return column at the ring indices of the array rings
+        """
+        rings = np.asarray(rings)
+        if rings.size and rings.max() >= self.length:
+            self.extend(max(2 * self.length, int(rings.max()) + 1))
+
+        return getattr(self, column)[rings]
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.length
+        if index >= self.length:
+            self.extend(max(2 * self.length, index + 1))
+
+        # build the row once
+        if index not in self.rows:
+            ht = self.type
+            self.rows[index] = Ring(int(self.ringWidth[index]), self.x[index].item(),
+                                    self.y[index].item(), self.area[index].item(),
+                                    int(self.value[index]), self.landValue[index].item(),
+                                    self.cumArea[index].item(), int(self.cumValue[index]),
+                                    int(self.cumLandValue[index]))
+        return self.rows[index]
+
+    def __len__(self):
+        return self.length
+
+    def __iter__(self):
+        for index in range(self.length):
+            yield self[index]
+
+################################################################################
+
 class House(object):
     """
     House Class
+
+    the geometric data of a house lives in a row of a MapState, a house is a
+    view onto that row. a house which is not part of a map gets a state of its own.
     """
-    def __init__(self, aType, aCoord, addRings):
+    def __init__(self, aType, aCoord, addRings, aState=None):
         self.type = aType
-        self.addRings = addRings
+
+        # the spatial index and occupancy raster of the map the house is part of, set by the map
+        self.index = None
+        self.raster = None
 
         # assign either a random coordinate, or assign given coordinate
         if aCoord == "random":
             # randomize numbers, with 0.5 precision
-            random_x = round(uniform(self.type.xLower, self.type.xUpper) * 2) / 2
-            random_y = round(uniform(self.type.yLower, self.type.yUpper) * 2) / 2
-
-            self.origin = (random_x, random_y)
+            origin = randomCoord((self.type.xLower, self.type.yLower),
+                                 (self.type.xUpper, self.type.yUpper))
         else:
-            self.origin = aCoord
+            origin = aCoord
+
+        # claim a row in the state
+        self.state = aState if aState is not None else MapState()
+        self.row = self.state.addRow(self.type, origin, addRings)
+        self.viewVersion = -1
 
         # update geometic info
         self.update()
 
-    def update(self):
-        # calculate additional geometric information, based on init's current value
-            # EXAMPLE a fam.house with 3 add.rings gives a ringWidth of 5.
+    @property
+    def origin(self):
+        return tuple(self.state.origin[self.row].tolist())
 
+    @origin.setter
+    def origin(self, aCoord):
+        self.state.write(self.row, origin=aCoord)
+
+    @property
+    def addRings(self):
+        return int(self.state.rings[self.row])
+
+    @addRings.setter
+    def addRings(self, addRings):
+        self.state.write(self.row, addRings=addRings)
+
+    @property
+    def ring(self):
         # select current ring
-        self.ring = self.type.ring[self.addRings]
+        return self.type.ring[self.addRings]
 
-        # house geometry rep. boundary
-        self.boundary = Rectangle(self.origin, self.type.width, self.type.height)
+    @property
+    def coord(self):
+        # make some synonimes for lazy use
+        return self.origin
 
-        # move houseOrigin diagonal to create ringOrigin
-        vector = (-1 * self.ring.ringWidth, -1 * self.ring.ringWidth)
-        ringOrigin = moveCoord(self.origin, vector)
+    @property
+    def boundary(self):
+        # house geometry rep. boundary
+        self.updateViews()
+        return self.houseRectangle
 
+    @property
+    def ringboundary(self):
         # house ring rep. boundary
-        self.ringboundary = Rectangle(ringOrigin, self.ring.x, self.ring.y)
+        self.updateViews()
+        return self.ringRectangle
 
-        # make some synonimes for lazy use
-        self.coord = self.origin
+    def updateViews(self):
+        """
+        rebuild the boundary rectangles, only if the row has been changed
+        """
+        version = self.state.rowVersion[self.row]
+        if version == self.viewVersion:
+            return
+        self.viewVersion = version
+
+        x1, y1, x2, y2 = self.state.bounds[self.row].tolist()
+        self.houseRectangle = Rectangle((x1, y1), x2 - x1, y2 - y1)
+
+        x1, y1, x2, y2 = self.state.ringBounds[self.row].tolist()
+        self.ringRectangle = Rectangle((x1, y1), x2 - x1, y2 - y1)
+
+    def attach(self, aState):
+        """
+        move the data of this house into a row of aState
+        """
+        if aState is self.state:
+            return
+        origin, addRings = self.origin, self.addRings
+        self.state = aState
+        self.row = aState.addRow(self.type, origin, addRings)
+        self.viewVersion = -1
+
+    def update(self):
+        # the state calculates all geometric information when origin or rings
+        # are written, EXAMPLE a fam.house with 3 add.rings gives a ringWidth of 5.
+
+        # keep the spatial index and raster of the map up to date
+        if self.index is not None:
+            self.index.update(self, self.ringboundary)
+        if self.raster is not None:
+            self.raster.update(self, [("house", self.boundary), ("ring", self.ringboundary)])
 
         if ORTHODOX:
             # recalculate distances to other houses,
@@ -268,6 +394,10 @@ class WaterBody(object):
     Water Class
     """
     def __init__(self, aCoord, aSurface, aRatio): #coord as tuple (x, y), surface as m2,
+        # the spatial index and occupancy raster of the map the waterbody is part of, set by the map
+        self.index = None
+        self.raster = None
+
         # STATIC create ratio's array, and an array sorted by probability
         # 0.25 , 0.50, 0.75, 1, 2, 3, 4
         highN = [i/1 for i in range(2, RATIO_UPPER_BOUND + 1)]
@@ -290,9 +420,7 @@ class WaterBody(object):
         # assign either a random coordinate, or assign given coordinate
         if aCoord == "random":
             # randomize numbers, with 0.5 precision, upperbound not precise, will need to check if valid move
-            random_x = round(uniform(0, AREA[0]) * 2) / 2
-            random_y = round(uniform(0, AREA[1]) * 2) / 2
-            self.origin = (random_x, random_y)
+            self.origin = randomCoord((0, 0), AREA)
         else:
             self.origin = aCoord
 
@@ -309,13 +437,19 @@ class WaterBody(object):
 
         # TODO fix rounding stuff, floats are slow and inaccurate
 
-        # update width & height
-        self.width  = sqrt(self.surface / self.ratio)
-        self.height = sqrt(self.surface * self.ratio)
+        # update width & height, rounding away the noise of the root, so exact sizes stay exact
+        self.width  = round(sqrt(self.surface / self.ratio), 9)
+        self.height = round(sqrt(self.surface * self.ratio), 9)
 
         # update rectangle information
         self.boundary = Rectangle(self.origin, self.width, self.height)
 
+        # keep the spatial index and raster of the map up to date
+        if self.index is not None:
+            self.index.update(self, self.boundary)
+        if self.raster is not None:
+            self.raster.update(self, [("water", self.boundary)])
+
         # lower and upper bounds could be done for coord's sake
 
     def changeLocation(self, aCoord):
@@ -326,10 +460,7 @@ class WaterBody(object):
         # assign either a random coordinate, or assign given coordinate
         if aCoord == "random":
             # randomize numbers, with 0.5 precision, upperbound not precise, will need to check if valid move
-            random_x = round(uniform(0, AREA[0]) * 2) / 2
-            random_y = round(uniform(0, AREA[1]) * 2) / 2
-
-            self.origin = (random_x, random_y)
+            self.origin = randomCoord((0, 0), AREA)
         else:
             self.origin = aCoord
         self.update()
@@ -365,6 +496,7 @@ class Rectangle(object):
     Methods:
     toString()                              # turn self. information into string
     isTouching(|rectangle / rectangles|)    # test if self is touching ||
+    isTouchingTight(|rectangle / rectangles|) # test if self is touching ||, sharing a wall included
     isWithin(|rectangle / rectangles|)      # test if self is completely within ||
     """
     def __init__(self, OriginCoord, width, height):
@@ -414,8 +546,8 @@ class Rectangle(object):
                 x = bound_coord[0]
                 y = bound_coord[1]
 
-                # test conditions
-                if not rec.x1 <= x < rec.x2 or not rec.y1 <= y < rec.y2:
+                # test conditions, the corners of self may lie on the boundary of rec
+                if not rec.x1 <= x <= rec.x2 or not rec.y1 <= y <= rec.y2:
                     return False
 
         # if code falls down till this part, position is correct
@@ -455,6 +587,23 @@ class Rectangle(object):
         # if code falls down till this part, none of the rectangles are overlapping with self
         return False
 
+    def isTouchingTight(self, listOfRectangles):
+        """
+        return true if self is touching any part of list of rectangles,
+        sharing a wall also counts as touching
+        """
+        # empty list means its not overlapping
+        if not listOfRectangles:
+            return False
+
+        # make it so a single rectangle also works
+        if not isinstance(listOfRectangles, Iterable):
+            listOfRectangles = [listOfRectangles]
+
+        # touching means a wall to wall distance of 0
+        gaps = rectangleGaps((self.x1, self.y1, self.x2, self.y2), boundaryArray(listOfRectangles))
+        return bool((gaps == 0).any())
+
     def getEdges(self, ringWidth):
 
         # order: TDLR
@@ -587,20 +736,46 @@ class Map(object):
     addHouseStupid(type, coord, rings)               # this could be deleted, its a raw way of adding a house, without any further calculations
     addHouse(type, coord, rings, *args)              # create a house in a certain smart version, for options, see the method description
     plot()                                           # plot all significant geometric information loaded into the map using mathplotlib
-    expandRings()                                    # expand the rings to their maximum allowed expantion, in other words, calculate value after this for actual map value
-    addWater()                                       # water add algorithm, using random locations and configurations. It tries to squeeze in water in between existing geometry
+    expandRings()                                    # expand the rings to their maximum allowed expantion (houses and map edge), in one vectorized pass
+    addWater()                                       # water add algorithm, packing water in the empty rectangles in between houses, using the least ring space
+    addWaterOld()                                    # old water add algorithm, using random locations and configurations
     calculateValueEstimate()                         # estimate map value using the currently placed rings
     calculateValue()                                 # the actual value of the map is calculated here, regardless of rings present
+    calculateValueOld()                              # pure python version of calculateValue, slow, use it to validate
+    getRows()                                        # the rows of the houses in the map state (struct of arrays)
+    setOrigins(houses, origins)                      # move a set of houses at once, by writing the map state
+    setRings(houses, addRings)                       # change the rings of a set of houses at once
+    getBoundaryArray()                               # all house boundaries as a (n, 4) numpy array
+    getMeasureArray()                                # the boundaries used by calculateValue, in ticks if the map is in integer mode
+    getOriginTicks()                                 # all house origins as a compact (n, 2) int32 array of half meter ticks
+    nearestHouse(house)                              # the closest other house, using the spatial index
+    isFree(rectangle, layers)                        # true if rectangle is within the map and not occupied, using the raster
+    freeOrigins(aType, layers)                       # all origins where a house of aType would not be touching anything of layers
+    randomFreeOrigin(aType, layers)                  # one uniformly picked origin out of freeOrigins, or None
+    countOccupied(rectangle, layers)                 # number of occupied half meter cells within rectangle
+    valueDelta(house, newOrigin)                     # change in map value if house would move to newOrigin, in O(n)
+    freeTravel(house, vector)                        # exact distance house can move along vector before it collides or leaves the map
+    lineSearch(house, vector, limit)                        # validity and map value of every step along vector up to the first contact
+    bestPositionFor(house)                           # the origin with the best map value for house, all other houses fixed
+    commitMove(house, newOrigin)                     # move house to newOrigin, keeping the nearest neighbour table up to date
+    scoreCandidates(house, origins)                  # validity and map value for a whole array of candidate origins at once
     getEdges(ringWidth)                              # used by FitInOnEdge algorithm, dont delete, but unimportant
     load()                                           # tara's on the case!
     save()                                           # tara's on the case!
     findHouseWithMostLandValueRingIncrease()         # THIS IS THE RING ADDER, it returns the index of the house with the best next ring
     areConstraintsSatisfied()                        # a final check, returns true if all map conditions are met
+    findViolations()                                 # all broken map conditions as a list of Violation(pair, kind)
+    packRings()                                      # place all houses with their rings deterministically, bottom left first, returns true if they fit
     rebuild( RUNTIME_LIMIT_MAP, RUNTIME_LIMIT_HOUSE) # place all houses on the map again with a certain guaranteed free space, and try to make them fit
+    rebuildRandom(RUNTIME_LIMIT_MAP, RUNTIME_LIMIT_HOUSE) # the random tries of rebuild only, without the packer
+    toArrays()                                       # the map as a dict of numpy arrays, to send it to another process
+    fromArrays(arrays, houseTypes)                   # static, build a map out of the arrays of toArrays
     saveJSON(self, nameOfFile)                       # save map to a json file with a certain name, can be used to make a real time rhino visualisation
     """
+    # number of candidate origins scored at once by bestPositionFor
+    CANDIDATE_CHUNK = 4096
 
-    def __init__(self, coord1=(0,0), coord2=AREA):
+    def __init__(self, coord1=(0,0), coord2=AREA, integer=False):
         # init base values
         self.coord1 = coord1
         self.coord2 = coord2
@@ -612,23 +787,43 @@ class Map(object):
         # houseIndex = 0
         self.waterBody = []
 
+        # the geometric data of all houses, as arrays. in integer coordinate mode
+        # distances are measured in half meter ticks, and compared as exact integers
+        self.integer = integer
+        self.scale = TICKS_PER_METER if integer else 1
+        self.state = MapState(integer=integer)
+
         # init a boundary for collision testing
         self.boundary = Rectangle(self.coord1, self.width, self.height)
 
+        # spatial indices for collision and neighbour queries, houses are
+        # registered with their ringboundary, waterbodies with their boundary
+        self.houseIndex = SpatialGrid()
+        self.waterIndex = SpatialGrid()
+
+        # half meter occupancy raster of house bodies, rings and water
+        self.raster = OccupancyRaster(self.coord1, self.coord2)
+
+        # nearest neighbour table for incremental evaluation, built on demand
+        self.distanceTable = None
+        self.pendingMove = None
+
     def addHouseStupid(self, aType, aCoord, addRings):
         """
         add a [aType] house to the map at [aCoord], with [addrings] rings
         """
 
-        # simple way of creating a house
-        self.house.append(House(aType, aCoord, addRings))
+        # simple way of creating a house, its row is claimed in the map state directly
+        self.house.append(House(aType, aCoord, addRings, self.state))
+        self.registerHouse(self.house[-1])
 
     def addHouse(self, aType, aCoord, addRings, *options):
         """
         add a [aType] house to the map at [aCoord], with [addrings] rings
         the following options are usable:
             ["non_colliding"]
-                pick random house locations until the position is valid.
+                place the house at a random position out of all valid positions,
+                sampled at once from the occupancy raster. returns 1 if there are none
             ["random_positions"]
                 place house at a random starting location
         """
@@ -638,82 +833,162 @@ class Map(object):
         if any(option == "non_colliding" for option in options):
             # print("make a house without colliding")
             LoopUntilValid = True
+
+        # a house which might not fit stays detached, it only claims a row
+        # in the map state once it is registered
+        state = None if LoopUntilValid else self.state
         if any(option == "random_positions" for option in options):
             # print("make house at a random location")
-            h = (House(aType, "random", addRings))
+            h = (House(aType, "random", addRings, state))
         else:
             # print("make a house in ordinary fashion")
-            h = (House(aType, aCoord, addRings))
+            h = (House(aType, aCoord, addRings, state))
 
         # directly append h if we dont need to check for valid position
         if not LoopUntilValid:
             self.house.append(h)
+            self.registerHouse(h)
         else:
-            # if we do need to check if placement is valid
-            relocateCounter = 0
-            MAX_ITERATIONS = 50000
-            # list of squares to test with
-            allRings = [house.ringboundary for house in self.house]
-
-            while(True):
-                # make iteration upper bound
-                if relocateCounter > MAX_ITERATIONS:
+            # if we do need to check if placement is valid, check if the h's
+            # house boundary is touching any ringboundary
+            if not self.isFree(h.boundary, ("ring",)):
+                # incorrect placement, pick a random valid one instead of trying again and again
+                origin = self.randomFreeOrigin(h.type, ("ring",))
+                if origin is None:
                     print("Cannot place house...")
                     return 1
-                # check if the h's house boundary is touching any existing ringboundary
-                if h.boundary.isTouching(allRings):
-                    # incorrect placement
-                    relocateCounter += 1
-                    h.relocate("random")
-                else:
-                    # correct placement
-                    self.house.append(h)
-                    # print("Times Relocated: ", relocateCounter)
-                    break
+                h.relocate(origin)
 
-    def expandRings(self):
+            # correct placement
+            self.house.append(h)
+            self.registerHouse(h)
+
+    def registerHouse(self, house):
         """
-        Expand all rings to their maximum possible value.
+        move the house data into the map state, and add house to the spatial index,
+        the house keeps it up to date from now on
         """
-        # NOTE this code might also work with coordinate distances, distance to edge etc, and then floor() the minimal answer
+        house.attach(self.state)
+        house.index = self.houseIndex
+        house.raster = self.raster
+        house.update()
 
-        print("\n Expanding rings...")
+    def registerWaterBody(self, waterBody):
+        """
+        add waterBody to the spatial index, it keeps it up to date from now on
+        """
+        waterBody.index = self.waterIndex
+        waterBody.raster = self.raster
+        waterBody.update()
+
+    def syncIndices(self):
+        """
+        rebuild the spatial indices if houses or waterbodies have been added or
+        removed without the map knowing it, like map1.waterBody.clear()
+        """
+        if len(self.raster) != len(self.house) + len(self.waterBody):
+            self.raster.clear()
+            self.houseIndex.clear()
+            self.waterIndex.clear()
 
-        # make a new list of houses
-        newHouses = []
+        if len(self.houseIndex) != len(self.house):
+            self.houseIndex.clear()
+            for house in self.house:
+                self.registerHouse(house)
 
-        # per imbedded hosue
-        for house in self.house:
-            # TODO do while loop?????
-            houses = self.house
+        if len(self.waterIndex) != len(self.waterBody):
+            self.waterIndex.clear()
+            for waterBody in self.waterBody:
+                self.registerWaterBody(waterBody)
 
-            # count number of rings added
-            added_rings = []
+    def countOccupied(self, rectangle, layers=OccupancyRaster.LAYERS):
+        """
+        return the number of half meter cells within rectangle which are occupied
+        in any of layers ("house", "ring", "water"), cells outside of the map included
+        """
+        self.syncIndices()
+        return self.raster.countOccupied(rectangle, layers)
 
-            # make new house with 1 more ring
-            hCurrent = house
-            hNew = (House(house.type, house.origin, house.addRings + 1))
+    def isFree(self, rectangle, layers=OccupancyRaster.LAYERS):
+        """
+        return true if rectangle lies within the map, and is not occupied in any of layers
+        """
+        return self.countOccupied(rectangle, layers) == 0
 
-            # save boundaries of all embedded houses
-            allBoundaries = [testhouse.boundary for testhouse in self.house if testhouse.origin != house.origin]
+    def freeOrigins(self, aType, layers=OccupancyRaster.LAYERS):
+        """
+        return all origins (m, 2) at which a house of aType lies within its bounds
+        and does not cover anything of layers, on the half meter grid
+        """
+        self.syncIndices()
+        mask = self.raster.freeOrigins(aType.width, aType.height, layers)
 
-            # the new ring is valid when its completely within map boundaries,
-            # and not any house can be touching this new ringboundary
-            # hNew.ringboundary.isWithin(self.boundary) and
-            while(not any([houseboundary.isTouching(hNew.ringboundary)
-                            for houseboundary in allBoundaries])):
-                # if new ring is possible, replace hCurrent with hNew, and repeat
-                added_rings.append(hNew.addRings)
+        # only keep the origins within the bounds of the house type
+        low  = [int(ceil((aType.xLower - self.coord1[0]) * TICKS_PER_METER)),
+                int(ceil((aType.yLower - self.coord1[1]) * TICKS_PER_METER))]
+        high = [int(floor((aType.xUpper - self.coord1[0]) * TICKS_PER_METER)) + 1,
+                int(floor((aType.yUpper - self.coord1[1]) * TICKS_PER_METER)) + 1]
+        mask = mask[max(low[0], 0):high[0], max(low[1], 0):high[1]]
 
-                hCurrent = hNew
-                hNew = (House(hCurrent.type, hCurrent.origin, hCurrent.addRings + 1))
+        cells = np.argwhere(mask) + np.maximum(low, 0)
+        return fromTicks(cells) + self.coord1
 
-            # if it is not possible, quit loop
-            # print(" rings added: ", added_rings)
-            newHouses.append(hCurrent)
+    def randomFreeOrigin(self, aType, layers=OccupancyRaster.LAYERS):
+        """
+        return a uniformly sampled origin out of freeOrigins, or None if there is none
+        """
+        origins = self.freeOrigins(aType, layers)
+        if not len(origins):
+            return None
 
-        # after all loopnig:
-        self.house = newHouses
+        x, y = origins[randrange(len(origins))]
+        return (float(x), float(y))
+
+    def isCollidingWith(self, house, index):
+        """
+        return true if the house is touching the ring of a house in index, or
+        if the ring of the house is touching a house in index
+        """
+        nearby = [other for other in index.query(house.ringboundary) if other is not house]
+
+        return (house.boundary.isTouching([other.ringboundary for other in nearby]) or
+                house.ringboundary.isTouching([other.boundary for other in nearby]))
+
+    def nearestHouse(self, house):
+        """
+        return (other house, distance) of the house closest to |house|,
+        measured from wall to wall, only searching nearby cells of the index
+        """
+        self.syncIndices()
+        return self.houseIndex.nearest(house.boundary, lambda other: other.boundary, house)
+
+    def expandRings(self):
+        """
+        Expand all rings to their maximum possible value.
+        the rings of all houses are derived from their clearance in one pass.
+        """
+        print("\n Expanding rings...")
+        if not self.house:
+            return
+
+        # the clearance of a house is the largest ring width that does not touch
+        # another house, a square ring only touches if both x and y gap are smaller
+        bounds = self.getMeasureArray()
+        dx, dy = gapComponents(bounds[:, None, :], bounds[None, :, :])
+        clearance = np.maximum(dx, dy)
+        np.fill_diagonal(clearance, farthest(clearance.dtype))
+        clearance = clearance.min(axis=1)
+
+        # the ring should stay within the map as well
+        edges = self.measure(np.array(self.coord1 + self.coord2, dtype=float))
+        edgeClearance = np.minimum(bounds[:, :2] - edges[:2], edges[2:] - bounds[:, 2:]).min(axis=1)
+        clearance = np.minimum(clearance, edgeClearance)
+
+        # ring[addRings] has a width of baseRing + addRings, take the largest one which fits.
+        # rings are never shrunk by expanding
+        rows = self.getRows()
+        fitting = np.floor_divide(clearance, self.scale).astype(np.int64) - self.state.baseRing[rows]
+        self.setRings(self.house, np.maximum(self.state.rings[rows], fitting))
 
     def shrinkRings(self):
         """
@@ -721,16 +996,50 @@ class Map(object):
         """
         print("\n shrinking rings...")
 
-        # per imbedded hosue
-        houses = self.house
-        for house in houses:
-
-            # this will set the number back to 0
-            house.changeRingsBy(house.addRings * -1)
+        # this will set the number back to 0, for all imbedded houses at once
+        self.setRings(self.house, np.zeros(len(self.house), dtype=np.int64))
 
     def addWater(self):
         """
         Add water to the map.
+
+        the WaterPlanner packs up to MAX_BODIES bodies within RATIO_UPPER_BOUND in
+        the empty rectangles in between the houses, losing as little ring space
+        as possible. deterministic, and fails at once if the water cannot be
+        packed. plans are cached, so adding water to an unchanged map is cheap.
+        """
+        # calculate water m2 needed, in cells of the raster
+        waterArea = WATER_PERCENTAGE * AREA[0] * AREA[1]
+        cellsNeeded = int(ceil(waterArea * TICKS_PER_METER ** 2))
+
+        # feedback
+        print()
+        print("adding {} m2 of water...".format(waterArea))
+
+        self.syncIndices()
+        bodies = WaterPlanner(self.raster).plan(cellsNeeded)
+
+        # the water could not be packed, dont leave any of it behind
+        if bodies is None:
+            print("Failed to add water...")
+            return False
+
+        for i, j, width, height in bodies:
+            origin = tuple(fromTicks((i, j)) + self.coord1)
+            width, height = width / TICKS_PER_METER, height / TICKS_PER_METER
+            wb = WaterBody(origin, width * height, height / width)
+            self.waterBody.append(wb)
+            self.registerWaterBody(wb)
+
+        print("Placed water.")
+        print("Done!")
+        return True
+
+    def addWaterOld(self):
+        """
+        Add water to the map.
+
+        NOTE the old random version of addWater, which guesses origins and ratios
         """
         # calculate water m2 needed
         waterArea = WATER_PERCENTAGE * AREA[0] * AREA[1]
@@ -746,6 +1055,7 @@ class Map(object):
         # init values to keep track of
         bodiesLeft = MAX_BODIES
         waterLeft = waterArea
+        self.syncIndices()
 
         # init waterBody, to prevent memory overload
         wb = WaterBody("random", STARTING_SIZE, "random")
@@ -765,9 +1075,7 @@ class Map(object):
             succeeded = False
             while(tries < MAX_TRIES):    # micro while loop
                 # if the waterbody isnt touching any houses or other bodies, and is within the map
-                if (not wb.boundary.isTouching([h.boundary for h in self.house]) and not
-                        wb.boundary.isTouching([w.boundary for w in self.waterBody]) and
-                        wb.boundary.isWithin(self.boundary)):
+                if self.isFree(wb.boundary, ("house", "water")):
                     # the waterbody is correct
                     succeeded = True
                     break
@@ -781,6 +1089,7 @@ class Map(object):
                 # success micro while loop: update counters, save wb, and build a 'new' wb
                 bodiesLeft -= 1
                 self.waterBody.append(wb)
+                self.registerWaterBody(wb)
                 waterLeft -= testSize
                 if waterLeft < testSize:
                     testSize = waterLeft
@@ -803,33 +1112,452 @@ class Map(object):
         # if macro while loop runs out, water could not be placed...
         print("Failed to add water...")
         self.waterBody.clear()
+        self.syncIndices()
         return False
 
     def getAllCorners(self):
 
         return [house.boundary.getBoundCoords() for house in self.house]
 
+    def getRows(self):
+        """
+        return the map state rows of all houses, in order of self.house.
+        houses added to self.house directly are moved into the map state here.
+        """
+        for house in self.house:
+            if house.state is not self.state:
+                self.registerHouse(house)
+
+        return np.array([house.row for house in self.house], dtype=np.intp)
+
+    def setOrigins(self, houses, origins):
+        """
+        move all |houses| to the (n, 2) array |origins| at once, writing the map
+        state directly instead of relocating house by house
+        """
+        self.getRows()
+        self.state.setOrigins([house.row for house in houses], origins)
+
+        # the spatial index still needs to know
+        for house in houses:
+            house.update()
+
+    def setRings(self, houses, addRings):
+        """
+        change the additional rings of a set of houses at once, by writing the map state
+        """
+        self.getRows()
+        self.state.setRings([house.row for house in houses], addRings)
+
+        # the spatial index still needs to know
+        for house in houses:
+            house.update()
+
+    def getBoundaryArray(self):
+        """
+        return the house boundaries of the map as a (n, 4) array
+        """
+        return self.state.bounds[self.getRows()]
+
+    def getMeasureArray(self):
+        """
+        return the house boundaries in the units distances are measured in:
+        int32 half meter ticks in integer mode, meters otherwise
+        """
+        if self.integer:
+            return self.state.tickBounds[self.getRows()]
+        return self.state.bounds[self.getRows()]
+
+    def measure(self, bounds):
+        """
+        turn boundaries in meters into the units distances are measured in
+        """
+        if self.integer:
+            return toTicks(bounds)
+        return bounds
+
+    def getOriginTicks(self):
+        """
+        return the origins of all houses as a (n, 2) int32 array of half meter ticks,
+        a compact and exact representation for saving maps and trajectories
+        """
+        return toTicks(self.state.origin[self.getRows()])
+
+    def getTypeArrays(self):
+        """
+        return the base ring, ring value and house value of every house as int arrays
+        """
+        rows = self.getRows()
+
+        return self.state.baseRing[rows], self.state.ringValue[rows], self.state.value[rows]
+
+    def valueFromShortest(self, shortestSquared, typeArrays):
+        """
+        turn the squared shortest distance of every house into the map value,
+        or -1 if a house is closer to another house than its mandatory personal space
+        """
+        return int(self.valuesFromShortest(shortestSquared[None, :], typeArrays)[0])
+
+    def valuesFromShortest(self, shortestSquared, typeArrays):
+        """
+        batched version of valueFromShortest, every row of |shortestSquared| is
+        a different configuration of the map. returns an int array of map values.
+        """
+        if (shortestSquared == farthest(shortestSquared.dtype)).any():
+            raise ValueError("calculateValue: a house has no other house to measure a distance to")
+        baseRing, ringValue, value = typeArrays
+
+        # the additional space is determined by subtracting the mandatory personal space,
+        # the root is only taken here, for the final ring count
+        addPersonalSpace = np.round(np.sqrt(shortestSquared) / self.scale).astype(np.int64) - baseRing
+
+        # accumulate ring prices and house prices
+        values = (ringValue * addPersonalSpace + value).sum(axis=-1)
+
+        # map conditions arent met if the mandatory personal space is violated
+        # (this method of map doubles as a validation checker)
+        baseRing = baseRing * self.scale
+        values[(shortestSquared < baseRing * baseRing).any(axis=-1)] = -1
+
+        return values
+
     def calculateValue(self):
         """
         Determine the value of the land.
+
+        vectorized version of calculateValueOld, which gives the exact same value.
+        the distance in between houses is measured from wall to wall.
+        returns -1 if a house is closer to another house than its mandatory personal space
         """
-        total = 0
+        if not self.house:
+            return 0
+
+        # shortest distance of every house towards all other houses
+        shortestSquared = gapSquaredMatrix(self.getMeasureArray()).min(axis=1)
+
+        return self.valueFromShortest(shortestSquared, self.getTypeArrays())
+
+    def buildDistanceTable(self):
+        """
+        (re)build the nearest neighbour table used by valueDelta and commitMove.
+        the table holds all squared distances between houses, and per house the
+        shortest of them.
+        """
+        self.pendingMove = None
+        self.distanceTable = {
+            'houses'   : list(self.house),
+            'bounds'   : self.getMeasureArray(),
+            'types'    : self.getTypeArrays(),
+            'version'  : self.state.originVersion
+        }
+        table = self.distanceTable
+        table['distances'] = gapSquaredMatrix(table['bounds'])
+        table['nearest']   = table['distances'].min(axis=1)
+        table['value']     = self.valueFromShortest(table['nearest'], table['types'])
+
+    def isDistanceTableValid(self):
+        """
+        return true if the table still represents the houses of the map,
+        houses moved without commitMove make the table invalid
+        """
+        table = self.distanceTable
+        if table is None or len(table['houses']) != len(self.house):
+            return False
+
+        return (table['version'] == self.state.originVersion and
+                all(a is b for a, b in zip(table['houses'], self.house)))
+
+    def valueDelta(self, house, newOrigin):
+        """
+        return the change of calculateValue if |house| would move to |newOrigin|,
+        without moving it. only the row of the moved house, and the houses whose
+        nearest neighbour was or becomes the moved house are recalculated.
+
+        NOTE -1 counts as a value, so moving towards an invalid map gives -1 - value
+        """
+        if not self.isDistanceTableValid():
+            self.buildDistanceTable()
+        table = self.distanceTable
+        distances = table['distances']
+        nearest = table['nearest']
+        i = table['houses'].index(house)
+
+        # new boundary of the moved house
+        bound = self.measure(np.array([newOrigin[0], newOrigin[1],
+                                       newOrigin[0] + house.type.width,
+                                       newOrigin[1] + house.type.height]))
+
+        # distances from the moved house, which are the same as towards the moved house
+        row = gapSquared(bound, table['bounds'])
+        row[i] = farthest(row.dtype)
+
+        # houses which had the moved house as nearest neighbour need a full row minimum
+        newNearest = np.minimum(nearest, row)
+        lost = np.flatnonzero((distances[:, i] <= nearest) & (row > distances[:, i]))
+        lost = lost[lost != i]
+        if len(lost):
+            others = distances[lost].copy()
+            others[:, i] = row[lost]
+            newNearest[lost] = others.min(axis=1)
+        newNearest[i] = row.min()
+
+        newValue = self.valueFromShortest(newNearest, table['types'])
+
+        # remember the calculation, so commitMove does not need to redo it
+        self.pendingMove = (house, newOrigin, i, bound, row, newNearest, newValue)
+
+        return newValue - table['value']
+
+    def getNearestWithout(self, i):
+        """
+        return the squared shortest distance of every house if house i would be
+        gone, out of the distance table. only houses which had house i as nearest
+        neighbour change, entry i itself is left as it is
+        """
+        distances = self.distanceTable['distances']
+        nearest = self.distanceTable['nearest']
+
+        nearestWithout = nearest.copy()
+        lost = np.flatnonzero(distances[:, i] <= nearest)
+        lost = lost[lost != i]
+        if len(lost):
+            others = distances[lost].copy()
+            others[:, i] = farthest(others.dtype)
+            nearestWithout[lost] = others.min(axis=1)
+
+        return nearestWithout
+
+    def scoreCandidates(self, house, origins):
+        """
+        score moving |house| to every origin in the (m, 2) array |origins| at once,
+        without moving it. returns (valid, values): valid is true if the house
+        would stay within the map and all map conditions are met, values holds
+        the resulting map values (-1 if the map conditions are not met).
+        """
+        if not self.isDistanceTableValid():
+            self.buildDistanceTable()
+        table = self.distanceTable
+        distances = table['distances']
+        nearest = table['nearest']
+        i = table['houses'].index(house)
+
+        # new boundaries of the moved house
+        origins = np.asarray(origins, dtype=float).reshape(-1, 2)
+        bounds = self.measure(np.hstack((origins, origins + (house.type.width, house.type.height))))
+
+        # distances from every candidate towards all houses
+        rows = gapSquared(bounds[:, None, :], table['bounds'][None, :, :])
+        rows[:, i] = farthest(rows.dtype)
 
-        # calculate all corners houses of the map
-        allCorners = self.getAllCorners()
+        # the shortest distance of the other houses when the moved house is gone
+        nearestWithout = self.getNearestWithout(i)
+
+        # combine, and turn into values
+        shortest = np.minimum(nearestWithout[None, :], rows)
+        shortest[:, i] = rows.min(axis=1)
+        values = self.valuesFromShortest(shortest, table['types'])
+
+        # the house should stay within the map
+        within = ((house.type.xLower <= origins[:, 0]) & (origins[:, 0] <= house.type.xUpper) &
+                  (house.type.yLower <= origins[:, 1]) & (origins[:, 1] <= house.type.yUpper))
+
+        return within & (values >= 0), values
+
+    def freeTravel(self, house, vector):
+        """
+        return how far |house| can move along |vector|, in multiples of it, before
+        it comes closer to another house than their mandatory personal space, or
+        leaves the map. exact, not stepped. 0 if the house can not move at all.
+        """
+        rows = self.getRows()
+        i = self.house.index(house)
+        others = np.arange(len(rows)) != i
+
+        # the house may not come closer than the largest mandatory ring of the two
+        baseRing = self.state.baseRing[rows]
+        bounds = self.state.bounds[rows]
+        travel = float(sweptEntry(bounds[i], vector, bounds[others],
+                                  np.maximum(baseRing[i], baseRing[others])).min(initial=inf))
+
+        # the bounds of the house type
+        ht = house.type
+        for v, o, low, high in ((vector[0], house.origin[0], ht.xLower, ht.xUpper),
+                                (vector[1], house.origin[1], ht.yLower, ht.yUpper)):
+            if v > 0:
+                travel = min(travel, (high - o) / v)
+            elif v < 0:
+                travel = min(travel, (low - o) / v)
+
+        return max(travel, 0.0)
+
+    def lineSearch(self, house, vector, limit=None):
+        """
+        score every step of |vector| the house can take up to the first contact,
+        or only the first |limit| of them, without moving it. returns the origins
+        of the steps, and their validity and map values (see scoreCandidates).
+        vector should lie on the half meter grid.
+        """
+        # a tiny margin, so a contact exactly at a step is not lost to rounding
+        count = int(floor(self.freeTravel(house, vector) + 1e-9))
+        if limit is not None:
+            count = min(count, limit)
+        if count == 0:
+            return [], np.zeros(0, dtype=bool), []
+
+        steps = np.arange(1, count + 1)[:, None]
+        origins = np.array(house.origin) + steps * np.array(vector)
+        valid, values = self.scoreCandidates(house, origins)
+
+        return [tuple(origin) for origin in origins.tolist()], valid, values.tolist()
+
+    def bestPositionFor(self, house):
+        """
+        return the legal origin on the half meter grid with the best map value for
+        |house|, all other houses fixed. the current origin is kept on a tie.
+
+        the value only changes where the house comes closer to or further from a
+        neighbour, so the candidates are the crossings of the lines along which it
+        touches the personal space of a neighbour or the map, and the lines half
+        way in between two walls. the best of them prunes the rest of the grid.
+        """
+        rows = self.getRows()
+        i = self.house.index(house)
+        others = np.arange(len(rows)) != i
+        bounds = self.state.bounds[rows][others]
+        baseRing = self.state.baseRing[rows]
+        distance = np.maximum(baseRing[i], baseRing[others])
+        ht = house.type
+
+        def lines(low, high, x1, x2, size):
+            # touching a neighbour, or half way in between two walls
+            walls = np.unique(np.concatenate((x1 - size, x2)))
+            values = np.concatenate(([low, high], x1 - size - distance, x2 + distance,
+                                     (walls[:-1] + walls[1:]) / 2))
+
+            # on the grid, within the bounds of the house type
+            values = np.concatenate((np.floor(values * TICKS_PER_METER), np.ceil(values * TICKS_PER_METER)))
+            values = np.unique(values) / TICKS_PER_METER
+            return values[(low <= values) & (values <= high)]
+
+        xs = lines(ht.xLower, ht.xUpper, bounds[:, 0], bounds[:, 2], ht.width)
+        ys = lines(ht.yLower, ht.yUpper, bounds[:, 1], bounds[:, 3], ht.height)
+        gridX, gridY = np.meshgrid(xs, ys, indexing="ij")
+        candidates = np.concatenate(([house.origin], np.stack((gridX.ravel(), gridY.ravel()), axis=1)))
+
+        # score in chunks, the first best one wins
+        best, bestValue = tuple(house.origin), -1
+        for start in range(0, len(candidates), self.CANDIDATE_CHUNK):
+            chunk = candidates[start:start + self.CANDIDATE_CHUNK]
+            valid, values = self.scoreCandidates(house, chunk)
+            values = np.where(valid, values, -1)
+            k = int(np.argmax(values))
+            if values[k] > bestValue:
+                best, bestValue = tuple(chunk[k].tolist()), int(values[k])
+
+        # the house only takes value away from its neighbours, so the value of the
+        # others without it plus its own rings bound what an origin can reach.
+        # score only the grid origins whose own clearance could still beat the best
+        table = self.distanceTable
+        baseRing, ringValue, value = table['types']
+        nearestWithout = self.getNearestWithout(i)
+
+        # a house with no other neighbour than this one (a map of two houses) has
+        # no nearest distance without it, no distance can exceed the map diagonal though
+        diagonal = self.measure(np.array([self.width, self.height], dtype=float)).astype(nearestWithout.dtype)
+        nearestWithout = np.minimum(nearestWithout, np.sum(diagonal * diagonal))
+        rest = int(np.sum(ringValue[others] * (np.round(np.sqrt(nearestWithout[others]) / self.scale)
+                                               .astype(np.int64) - baseRing[others]) + value[others]))
+
+        # beating the best takes an own clearance of at least |reach| meters,
+        # a Euclidean clearance of |reach| needs |reach| / sqrt(2) along x or y
+        reach = max(float(baseRing[i]), 0.5 + (bestValue - rest - value[i]) // ringValue[i] + baseRing[i])
+        reach = reach / sqrt(2)
+
+        # grid origins, blocked if any grown neighbour strictly covers them
+        xs = np.arange(toTicks(ht.xLower), toTicks(ht.xUpper) + 1)
+        ys = np.arange(toTicks(ht.yLower), toTicks(ht.yUpper) + 1)
+        low  = np.floor(np.stack((bounds[:, 0] - ht.width - reach, bounds[:, 1] - ht.height - reach), axis=1)
+                        * TICKS_PER_METER).astype(np.int64) + 1
+        high = np.ceil(np.stack((bounds[:, 2] + reach, bounds[:, 3] + reach), axis=1)
+                       * TICKS_PER_METER).astype(np.int64)
+        i1, j1 = np.clip(low[:, 0] - xs[0], 0, len(xs)), np.clip(low[:, 1] - ys[0], 0, len(ys))
+        i2, j2 = np.clip(high[:, 0] - xs[0], 0, len(xs)), np.clip(high[:, 1] - ys[0], 0, len(ys))
+        keep = (i1 < i2) & (j1 < j2)
+        covered = np.zeros((len(xs) + 1, len(ys) + 1), dtype=np.int64)
+        np.add.at(covered, (i1[keep], j1[keep]), 1)
+        np.add.at(covered, (i2[keep], j1[keep]), -1)
+        np.add.at(covered, (i1[keep], j2[keep]), -1)
+        np.add.at(covered, (i2[keep], j2[keep]), 1)
+        covered = covered.cumsum(axis=0).cumsum(axis=1)[:-1, :-1]
+        gridI, gridJ = np.nonzero(covered == 0)
+        grid = np.stack((xs[gridI], ys[gridJ]), axis=1) / TICKS_PER_METER
+
+        # the exact bound of what is left, and the exact value of what can still win
+        for start in range(0, len(grid), self.CANDIDATE_CHUNK):
+            chunk = grid[start:start + self.CANDIDATE_CHUNK]
+            chunkBounds = self.measure(np.hstack((chunk, chunk + (ht.width, ht.height))))
+            clearance = gapSquared(chunkBounds[:, None, :], table['bounds'][None, others, :]).min(axis=1)
+            bound = rest + ringValue[i] * (np.round(np.sqrt(clearance) / self.scale).astype(np.int64) - baseRing[i]) + value[i]
+            bound[clearance < (baseRing[i] * self.scale) ** 2] = -1
+            chunk = chunk[bound > bestValue]
+            if not len(chunk):
+                continue
+
+            valid, values = self.scoreCandidates(house, chunk)
+            values = np.where(valid, values, -1)
+            k = int(np.argmax(values))
+            if values[k] > bestValue:
+                best, bestValue = tuple(chunk[k].tolist()), int(values[k])
+
+        return best
+
+    def commitMove(self, house, newOrigin):
+        """
+        relocate |house| to |newOrigin| and update the nearest neighbour table.
+        returns the new value of the map.
+        """
+        pending = self.pendingMove
+        if (pending is None or pending[0] is not house or pending[1] != newOrigin or
+                not self.isDistanceTableValid()):
+            self.valueDelta(house, newOrigin)
+        house, newOrigin, i, bound, row, newNearest, newValue = self.pendingMove
+        self.pendingMove = None
+
+        # move the house itself
+        house.relocate(newOrigin)
+
+        # update the table
+        table = self.distanceTable
+        table['version'] = self.state.originVersion
+        table['bounds'][i] = bound
+        table['distances'][i, :] = row
+        table['distances'][:, i] = row
+        table['nearest'] = newNearest
+        table['value'] = newValue
+
+        return newValue
+
+    def calculateValueOld(self):
+        """
+        Determine the value of the land.
+        """
+        total = 0
 
         # per house
         for house in self.house:
 
-            # calculate the shortest distance between a boundary and other boundaries
-            shortest = house.boundary.getShortestDistance(allCorners)
+            # calculate the shortest wall to wall distance between a boundary and other boundaries
+            shortest = min(rectangleGap(house.boundary, other.boundary)
+                           for other in self.house if other is not house)
 
-            # the additional space is determined by subtracting the mandatory personal space
-            addPersonalSpace = shortest - house.type.baseRing
-            if addPersonalSpace < 0:
-                # map conditions arent met (this method of map doubles as a validation checker)
+            # map conditions arent met if the mandatory personal space is violated
+            # (this method of map doubles as a validation checker)
+            if shortest < house.type.baseRing:
                 return -1
 
+            # the additional space is determined by subtracting the mandatory personal space
+            addPersonalSpace = round(shortest) - house.type.baseRing
+
             # now, calculate the value of this house
             ringPrice = (int) (house.type.ringValue * addPersonalSpace)
             housePrice = house.type.value
@@ -844,13 +1572,10 @@ class Map(object):
         """
         Determine the value of the land.
         """
-        total = 0
-        # per house
-        for house in self.house:
-            # add house's cummilative value of the current ring
-            total += house.ring.cumValue
+        # every house's cummilative value of its current ring, in one lookup
+        rows = self.getRows()
 
-        return total
+        return int(HouseType.valueForRings(self.state.typeId[rows], self.state.rings[rows]).sum())
 
     def getEdges(self, ringWidth):
         """
@@ -864,6 +1589,40 @@ class Map(object):
                 [(0,0), (0,0), 0, "Lm"],  # left range
                 [(0,0), (0,0), 0, "Rm"]]  # right range
 
+    def toArrays(self):
+        """
+        return the map as a dict of plain numpy arrays, small and picklable, so
+        maps can be sent in between processes. see fromArrays
+        """
+        return {"coord1"  : self.coord1,
+                "coord2"  : self.coord2,
+                "integer" : self.integer,
+                "typeIds" : np.array([house.type.integer for house in self.house], dtype=np.int64),
+                "origins" : np.array([house.origin for house in self.house], dtype=float).reshape(-1, 2),
+                "rings"   : np.array([house.addRings for house in self.house], dtype=np.int64),
+                "water"   : np.array([tuple(water.origin) + (water.surface, water.ratio) for water in self.waterBody],
+                                     dtype=float).reshape(-1, 4)}
+
+    @staticmethod
+    def fromArrays(arrays, houseTypes=None):
+        """
+        build a map out of the arrays of toArrays. the house types are looked up
+        by integer in houseTypes, or instantiated if they are not given
+        """
+        if houseTypes is None:
+            houseTypes = initHouseTypes()
+        types = {ht.integer: ht for ht in houseTypes}
+
+        aMap = Map(arrays["coord1"], arrays["coord2"], arrays["integer"])
+        for typeId, origin, addRings in zip(arrays["typeIds"].tolist(), arrays["origins"].tolist(),
+                                            arrays["rings"].tolist()):
+            aMap.addHouse(types[typeId], tuple(origin), addRings)
+        for x, y, surface, ratio in arrays["water"].tolist():
+            aMap.waterBody.append(WaterBody((x, y), surface, ratio))
+            aMap.registerWaterBody(aMap.waterBody[-1])
+
+        return aMap
+
     """ tara is on the case! """
     def load():
         # TODO
@@ -875,21 +1634,13 @@ class Map(object):
 
     def findHouseWithMostLandValueRingIncrease(self):
 
-        housedata = []
-        # iterate through houses
-        for index, house in enumerate(self.house):
-            # get the landValue of the next ring
-            pair = (house.type.ring[house.addRings + 1].landValue, index)
-
-            # add data to list
-            housedata.append(pair)
+        # get the landValue of the next ring of every house
+        rows = self.getRows()
+        landValues = HouseType.lookupRings("landValue", self.state.typeId[rows],
+                                           self.state.rings[rows] + 1)
 
-        # sort
-        # print(housedata)
-        selected_house = max(housedata, key=operator.itemgetter(0))
-        # print(selected_house)
-
-        return selected_house[1]
+        # the first house with the best next ring
+        return int(np.argmax(landValues))
 
     def setHouseData(self, listOfratiorepresentatives):
         """
@@ -953,14 +1704,50 @@ class Map(object):
             dataStart = listOfratiorepresentatives[typeID]
             self.houseData.append(dataStart)
 
+    def findViolations(self):
+        """
+        return a list of Violation((object, object), kind) of all broken map
+        conditions, empty if the map is correct. see validation.py for the kinds.
+        uses a sort and sweep over all houses, rings and water in O(n log n).
+        NOTE this method judges the map based upon the current rings
+        """
+        rows = self.getRows()
+        waterBounds = boundaryArray([wb.boundary for wb in self.waterBody])
+        mapBounds = self.coord1 + self.coord2
+
+        violations = []
+        for i, j, kind in sweepViolations(self.state.bounds[rows], self.state.ringBounds[rows],
+                                          self.state.baseRing[rows], waterBounds, mapBounds):
+            if kind == "houseTouch":
+                pair = (self.house[i], self.house[j])
+            elif kind == "houseWater":
+                pair = (self.house[i], self.waterBody[j])
+            elif kind == "waterTouch":
+                pair = (self.waterBody[i], self.waterBody[j])
+            elif kind == "houseWithin":
+                pair = (self.house[i], None)
+            else:
+                pair = (self.waterBody[i], None)
+            violations.append(Violation(pair, kind))
+
+        return violations
+
     def areConstraintsSatisfied(self):
+        """
+        a final check, returns true if all map conditions are met.
+        fast enough to assert after every accepted move, see findViolations
+        """
+        return not self.findViolations()
+
+    def areConstraintsSatisfiedOld(self):
         # NOTE THIS IS REALLY SLOW, MEANT AS A LAST CHECK
         # NOTE this method judges the map based upon the current rings
+        self.syncIndices()
         for house in self.house:
 
-            # all houses with selection excluded, and waterbodies
-            otherBounds = [h.ringboundary for h in self.house if h is not house]
-            otherBounds.extend([wb.boundary for wb in self.waterBody])
+            # all nearby houses with selection excluded, and nearby waterbodies
+            otherBounds = [h.ringboundary for h in self.houseIndex.query(house.boundary) if h is not house]
+            otherBounds.extend([wb.boundary for wb in self.waterIndex.query(house.boundary)])
 
             # check if this house's ringboundary is touching any other selected boundaries
             if house.boundary.isTouching(otherBounds):
@@ -977,8 +1764,8 @@ class Map(object):
 
             # NOTE houses do not need to be checked, done before
 
-            # all water with selection excluded
-            otherWaterBounds = [wb.boundary for wb in self.waterBody if wb is not waterBody]
+            # all nearby water with selection excluded
+            otherWaterBounds = [wb.boundary for wb in self.waterIndex.query(waterBody.boundary) if wb is not waterBody]
 
             # check if this body of water isnt touching other waterbodies
             if waterBody.boundary.isTouching(otherWaterBounds):
@@ -993,14 +1780,59 @@ class Map(object):
         # if code falls to this point, map is correct
         return True
 
+    def packRings(self):
+        """
+        place all houses with their current rings using the bottom left fill
+        packer. returns true and moves the houses if they all fit, returns false
+        and leaves the map untouched if not. takes milliseconds, so it doubles as
+        a quick check whether a set of rings fits at all.
+        """
+        if not self.house:
+            return True
+
+        sizes  = [(house.type.width, house.type.height) for house in self.house]
+        rings  = [house.ring.ringWidth for house in self.house]
+        lower  = [(house.type.xLower, house.type.yLower) for house in self.house]
+        upper  = [(house.type.xUpper, house.type.yUpper) for house in self.house]
+
+        origins = BottomLeftPacker().pack(sizes, rings, lower, upper)
+        if origins is None:
+            return False
+
+        self.setOrigins(self.house, origins)
+        return True
+
     def rebuild(self, RUNTIME_LIMIT_MAP, RUNTIME_LIMIT_HOUSE):
         """
         rebuild the map in random fashion with 1000 tries.
 
+        every house is placed against an edge of the map or of a house placed
+        before it, picked out of the edge index by free contact length, so a
+        placement is valid in one draw. only if no edge has room left, the house
+        is relocated at random up to RUNTIME_LIMIT_HOUSE times.
+
+        the deterministic packer is tried first, if it fits all houses the map
+        is done in one try.
+
         NOTE instantiating new houses for example a thousand times takes up
              alot of memory, so instead this algorithm moves houses around.
         """
+        if self.packRings():
+            return 1
+
+        iterationMap = self.rebuildRandom(RUNTIME_LIMIT_MAP, RUNTIME_LIMIT_HOUSE)
+
+        # if code falls though here, map could not be
+        if iterationMap <= -1:
+            print("map.rebuild Runtime Error")
+        return iterationMap
 
+    def rebuildRandom(self, RUNTIME_LIMIT_MAP, RUNTIME_LIMIT_HOUSE):
+        """
+        the random part of rebuild, without the packer: up to RUNTIME_LIMIT_MAP
+        tries of placing all houses against the edges of the edge index.
+        returns the number of tries, or -1 if none succeeded
+        """
         # try LIMIT amound of times
         iterationMap = 0
         while(iterationMap < RUNTIME_LIMIT_MAP):
@@ -1008,23 +1840,21 @@ class Map(object):
             # create a quick way to go to the next map try
             nextMap = False
 
-            # build list from newly placed houses to compare with
-            compareBoundaries = []
-            compareRingBoundaries = []
-            edges = self.getEdges(0)
+            # build an index from newly placed houses to compare with, and their edges
+            placed = SpatialGrid(self.houseIndex.cellSize)
+            edges = EdgeIndex()
             iterationMap += 1
 
             # go trough all houses
             for house in self.house:
 
-                # relocate regardless of correct or not
-                house.relocate("random_on_edge", edges)
+                # place against a free edge, or at random if there is none
+                origin = edges.sample(house)
+                house.relocate("random" if origin is None else origin)
                 iterationHouse = 0
 
                 # while this house is incorrectly placed
-                while(house.boundary.isTouching(compareRingBoundaries) or
-                      house.ringboundary.isTouching(compareBoundaries) or
-                      not house.isWithinMap()):
+                while(not house.isWithinMap() or self.isCollidingWith(house, placed)):
 
                     # if house iterations have reached their upper limit
                     if iterationHouse >= RUNTIME_LIMIT_HOUSE:
@@ -1033,16 +1863,15 @@ class Map(object):
 
                     # try a new position
                     iterationHouse += 1
-                    house.relocate("random_on_edge", edges)
+                    house.relocate("random")
 
                 # goto next map iteration
                 if nextMap == True:
                     break
 
-                # else house is correct, add it to comparrison list
-                compareBoundaries.append(house.boundary)
-                compareRingBoundaries.append(house.ringboundary)
-                edges.extend(house.boundary.getEdges(house.ring.ringWidth))
+                # else house is correct, add it to comparrison index
+                placed.insert(house, house.ringboundary)
+                edges.insert(house)
 
             # goto next map iteration
             if nextMap == True:
@@ -1051,8 +1880,6 @@ class Map(object):
             # else map is correct
             return iterationMap
 
-        # if code falls though here, map could not be
-        print("map.rebuild Runtime Error")
         return -1
 
     def plot(self):
@@ -0,0 +1,151 @@
+
+"""
+NAME    edges.py
+
+AUTHOR  Jos Feenstra
+        Tara Elsen
+        Christiaan Wewer
+
+DESC    contains the classes:
+        - EdgeIndex
+
+NOTE    an edge is one side of a placed house (or of the map). a new house
+        placed against it keeps exactly the larger of both ring widths as
+        distance, and may slide along the side as long as they still touch.
+        only the positions along an edge where the new house fits count as
+        free contact length, and edges are sampled by that length.
+
+"""
+# dependent upon the methods, constances and libaries in helpers
+from helpers import *
+
+def overlapMatrix(selfBounds, otherBounds):
+    """
+    return a (n, m) boolean matrix, true if rectangle i of selfBounds shares
+    some area with rectangle j of otherBounds. touching walls do not count
+    """
+    a = selfBounds[:, None, :]
+    b = otherBounds[None, :, :]
+
+    return ((a[..., 0] < b[..., 2]) & (b[..., 0] < a[..., 2]) &
+            (a[..., 1] < b[..., 3]) & (b[..., 1] < a[..., 3]))
+
+################################################################################
+
+class EdgeIndex(object):
+    """
+    the edges of a set of placed houses and of the map, used by Map.rebuild
+    to place a house against an edge in one draw.
+
+    Methods:
+    insert(house)                           # house is placed, its 4 sides become edges
+    getCandidates(house)                    # all free origins of house against any edge, (m, 2) array
+    sample(house)                           # one uniformly picked free origin, or None
+    """
+    # sides of a placed house, and of the map
+    SIDES    = ("T", "D", "L", "R")
+    MAPSIDES = ("Tm", "Dm", "Lm", "Rm")
+
+    def __init__(self):
+
+        # the placed houses, with their ring width
+        self.anchors = []
+
+        # boundaries of the bodies and rings of the placed houses
+        self.bounds = np.zeros((0, 4))
+        self.ringBounds = np.zeros((0, 4))
+
+        # edges without free contact length, per house type and ring width.
+        # space only runs out while houses are placed, so dead edges stay dead
+        self.dead = {}
+
+    def insert(self, house):
+        self.anchors.append((house.boundary, house.ring.ringWidth))
+        self.bounds = np.vstack((self.bounds, boundaryArray([house.boundary])))
+        self.ringBounds = np.vstack((self.ringBounds, boundaryArray([house.ringboundary])))
+
+    def getSegments(self, house):
+        """
+        yield (key, start, end) of every edge which is not dead for house, the
+        origins of house against it lie on the line from start to end
+        """
+        ht = house.type
+        ring = house.ring.ringWidth
+        dead = self.dead.setdefault((ht.integer, ring), set())
+
+        # the map edges, the house keeps its mandatory ring within the map
+        mapSegments = {"Tm": ((ht.xLower, ht.yUpper), (ht.xUpper, ht.yUpper)),
+                       "Dm": ((ht.xLower, ht.yLower), (ht.xUpper, ht.yLower)),
+                       "Lm": ((ht.xLower, ht.yLower), (ht.xLower, ht.yUpper)),
+                       "Rm": ((ht.xUpper, ht.yLower), (ht.xUpper, ht.yUpper))}
+        for side in self.MAPSIDES:
+            if side not in dead:
+                yield (side,) + mapSegments[side]
+
+        # the sides of placed houses, every position where both still touch
+        for k, (rec, ringOther) in enumerate(self.anchors):
+            d = max(ring, ringOther)
+            segments = {"T": ((rec.x1 - ht.width, rec.y2 + d), (rec.x2, rec.y2 + d)),
+                        "D": ((rec.x1 - ht.width, rec.y1 - d - ht.height), (rec.x2, rec.y1 - d - ht.height)),
+                        "L": ((rec.x2 + d, rec.y1 - ht.height), (rec.x2 + d, rec.y2)),
+                        "R": ((rec.x1 - d - ht.width, rec.y1 - ht.height), (rec.x1 - d - ht.width, rec.y2))}
+            for side in self.SIDES:
+                if (k, side) not in dead:
+                    yield ((k, side),) + segments[side]
+
+    def getCandidates(self, house):
+        """
+        return all origins on the half meter grid at which house touches an edge,
+        lies within its bounds, and does not collide with the placed houses
+        """
+        ht = house.type
+        ring = house.ring.ringWidth
+
+        # all edges, clipped to the bounds of the house type, in ticks
+        keys = []
+        segments = []
+        for key, start, end in self.getSegments(house):
+            keys.append(key)
+            segments.append(start + end)
+        if not keys:
+            return np.zeros((0, 2))
+        segments = np.array(segments)
+        low  = toTicks(np.maximum(segments[:, :2], (ht.xLower, ht.yLower)))
+        high = toTicks(np.minimum(segments[:, 2:], (ht.xUpper, ht.yUpper)))
+        counts = np.where((low > high).any(axis=1), 0, (high - low).max(axis=1) + 1)
+
+        # all grid points of all edges, and the edge they belong to
+        edge = np.repeat(np.arange(len(keys)), counts)
+        steps = np.arange(len(edge)) - np.repeat(np.cumsum(counts) - counts, counts)
+        origins = fromTicks(low[edge] + steps[:, None] * np.sign(high - low)[edge])
+
+        # the house should not lie within a ring, its ring not on top of a house
+        bounds = np.hstack((origins, origins + (ht.width, ht.height)))
+        ringBounds = bounds + (-ring, -ring, ring, ring)
+        free = ~(overlapMatrix(bounds, self.ringBounds).any(axis=1) |
+                 overlapMatrix(ringBounds, self.bounds).any(axis=1))
+
+        # remember which edges have no free contact length left
+        alive = np.zeros(len(keys), dtype=bool)
+        alive[edge[free]] = True
+        self.dead[(ht.integer, ring)].update(key for key, isAlive in zip(keys, alive) if not isAlive)
+
+        # points shared by two edges only count once, packed as one integer per tick pair
+        ticks = toTicks(origins[free]).astype(np.int64)
+        packed = np.unique(ticks[:, 0] << 32 | ticks[:, 1])
+
+        return fromTicks(np.stack((packed >> 32, packed & 0xFFFFFFFF), axis=1))
+
+    def sample(self, house):
+        """
+        return a uniformly picked free origin of house against any edge, which
+        weighs every edge by its free contact length. None if there is none
+        """
+        candidates = self.getCandidates(house)
+        if not len(candidates):
+            return None
+
+        x, y = candidates[randrange(len(candidates))]
+        return (float(x), float(y))
+
+################################################################################
@@ -0,0 +1,131 @@
+
+"""
+NAME    feasibility.py
+
+AUTHOR  Jos Feenstra
+        Tara Elsen
+        Christiaan Wewer
+
+DESC    contains the classes:
+        - FeasibilityOracle
+
+NOTE    two houses fit next to each other if the gap in between them is at
+        least the largest of their ring widths. so if every house is grown by
+        half its ring width, the grown houses never overlap. their total area,
+        and their width along any line through the map, can therefore never
+        exceed that of the (grown) map. if they do, no rebuild will ever work.
+
+        houses of the same type with the same ring are interchangeable, so a
+        verdict only depends on the sorted list of (type, ring width) pairs.
+
+"""
+# dependent upon the methods, constances and libaries in helpers
+from helpers import *
+
+################################################################################
+
+class FeasibilityOracle(object):
+    """
+    gatekeeper in front of Map.rebuild. rejects ring configurations which
+    can not fit at once, and remembers the layout of every configuration
+    rebuilt before. a failed rebuild is no proof, so it is not remembered.
+
+    Methods:
+    rebuild(aMap, RUNTIME_LIMIT_MAP, RUNTIME_LIMIT_HOUSE)    # like Map.rebuild, but checked and cached first
+    isSurelyInfeasible(aMap)                                 # true if the houses and rings can not fit, by area or strip width
+    getKey(aMap)                                             # the configuration of aMap, sorted (type, ring width) pairs
+    """
+    # verdicts per configuration, shared by all maps: the layout, or None if surely infeasible
+    cache = OrderedDict()
+    CACHE_SIZE = 4096
+
+    def __init__(self, rebuilder=None):
+
+        # rebuilds the maps which pass, like a ParallelRebuilder. Map.rebuild if None
+        self.rebuilder = rebuilder
+
+    def getOrder(self, aMap):
+        """
+        return the house indices, sorted by type and ring width
+        """
+        return sorted(range(len(aMap.house)),
+                      key=lambda i: (aMap.house[i].type.integer, aMap.house[i].ring.ringWidth))
+
+    def getKey(self, aMap):
+        rings = tuple((aMap.house[i].type.integer, aMap.house[i].ring.ringWidth) for i in self.getOrder(aMap))
+        return (aMap.width, aMap.height, rings)
+
+    def isSurelyInfeasible(self, aMap):
+        """
+        return true if the houses with their rings can not all fit on the map.
+        only necessary conditions are checked, so false does not mean they fit
+        """
+        if not aMap.house:
+            return False
+
+        sizes = np.array([(house.type.width, house.type.height) for house in aMap.house], dtype=float)
+        rings = np.array([house.ring.ringWidth for house in aMap.house], dtype=float)
+        baseRings = np.array([house.type.baseRing for house in aMap.house], dtype=float)
+
+        # the houses grown by half their ring, and the map grown by as much as
+        # they may stick out of it (only the mandatory ring has to be within)
+        grown = sizes + rings[:, None]
+        margin = max(0.0, float(np.max(rings / 2 - baseRings)))
+        width, height = aMap.width + 2 * margin, aMap.height + 2 * margin
+
+        # area bound
+        if np.sum(grown[:, 0] * grown[:, 1]) > width * height:
+            return True
+
+        # strip bounds: houses taller than half the map all cross its middle
+        # line, so they lie next to each other. the same goes for wide ones
+        tall = grown[:, 1] > height / 2
+        wide = grown[:, 0] > width / 2
+        if np.sum(grown[tall, 0]) > width or np.sum(grown[wide, 1]) > height:
+            return True
+
+        return False
+
+    def remember(self, key, layout):
+        FeasibilityOracle.cache[key] = layout
+        if len(FeasibilityOracle.cache) > FeasibilityOracle.CACHE_SIZE:
+            FeasibilityOracle.cache.popitem(last=False)
+
+    def rebuild(self, aMap, RUNTIME_LIMIT_MAP, RUNTIME_LIMIT_HOUSE):
+        """
+        rebuild aMap, returns the number of map tries like Map.rebuild (1 if a
+        stored layout was reused), or -1 if the configuration does not fit or
+        the rebuild failed. a map rejected without a rebuild is left untouched.
+        """
+        key = self.getKey(aMap)
+        order = self.getOrder(aMap)
+        houses = [aMap.house[i] for i in order]
+
+        # known configuration, answer from the cache
+        if key in FeasibilityOracle.cache:
+            FeasibilityOracle.cache.move_to_end(key)
+            layout = FeasibilityOracle.cache[key]
+            if layout is None:
+                return -1
+
+            aMap.setOrigins(houses, layout)
+            return 1
+
+        # cheap checks first
+        if self.isSurelyInfeasible(aMap):
+            self.remember(key, None)
+            return -1
+
+        if self.rebuilder is None:
+            mapIterations = aMap.rebuild(RUNTIME_LIMIT_MAP, RUNTIME_LIMIT_HOUSE)
+        else:
+            mapIterations = self.rebuilder.rebuild(aMap, RUNTIME_LIMIT_MAP, RUNTIME_LIMIT_HOUSE)
+
+        # a failed random rebuild does not prove the configuration can not fit,
+        # only the layouts found are remembered
+        if mapIterations > -1:
+            self.remember(key, np.array([house.origin for house in houses], dtype=float))
+
+        return mapIterations
+
+################################################################################
@@ -0,0 +1,209 @@
+
+"""
+NAME    geometry.py
+
+AUTHOR  Jos Feenstra
+        Tara Elsen
+        Christiaan Wewer
+
+DESC    contains the vectorized geometry kernels the map evaluation relies upon:
+        - farthest
+        - boundaryArray
+        - gapComponents
+        - gapSquared
+        - gapSquaredMatrix
+        - rectangleGap
+        - rectangleGaps
+        - sweptEntry
+        - cornerDistances         (old corner approximation)
+        - cornerDistanceMatrix    (old corner approximation)
+
+NOTE    boundaries are represented as (n, 4) numpy arrays, every row holds
+        [x1, y1, x2, y2] of one rectangle. keep the kernels free of python
+        loops, calculateValue runs after every single step of the algorithms.
+        the kernels work on float meters as well as on int half meter ticks,
+        squared tick distances are exact integers.
+
+"""
+# dependent upon the methods, constances and libaries in helpers
+from helpers import *
+
+# column indices of a boundary array
+X1, Y1, X2, Y2 = 0, 1, 2, 3
+
+def farthest(dtype):
+    """
+    return the largest distance dtype can hold, used as 'no other rectangle'
+    """
+    if np.dtype(dtype).kind == "f":
+        return np.inf
+    return np.iinfo(dtype).max
+
+def boundaryArray(listOfRectangles):
+    """
+    turn a list of Rectangle objects into a (n, 4) boundary array
+    """
+    bounds = np.empty((len(listOfRectangles), 4), dtype=float)
+    for i, rec in enumerate(listOfRectangles):
+        bounds[i] = (rec.x1, rec.y1, rec.x2, rec.y2)
+
+    return bounds
+
+def gapComponents(selfBounds, otherBounds):
+    """
+    return the x and y gap in between the rectangles in selfBounds and the
+    rectangles in otherBounds, the two arrays are broadcasted against each other.
+    a gap is 0 if the rectangles overlap on that axis.
+    """
+    dx = np.maximum(otherBounds[..., X1] - selfBounds[..., X2],
+                    selfBounds[..., X1] - otherBounds[..., X2])
+    dy = np.maximum(otherBounds[..., Y1] - selfBounds[..., Y2],
+                    selfBounds[..., Y1] - otherBounds[..., Y2])
+
+    return np.maximum(dx, 0), np.maximum(dy, 0)
+
+def gapSquared(selfBounds, otherBounds):
+    """
+    return the squared wall to wall distance in between the rectangles in
+    selfBounds and otherBounds (broadcasted). the root is left out on purpose,
+    comparing squared distances gives the same answers.
+    """
+    dx, dy = gapComponents(selfBounds, otherBounds)
+
+    # square ticks in 64 bit, so the squares can not overflow
+    if dx.dtype.kind in "iu":
+        dx = dx.astype(np.int64)
+        dy = dy.astype(np.int64)
+
+    return dx * dx + dy * dy
+
+def gapSquaredMatrix(bounds):
+    """
+    return a (n, n) matrix of squared wall to wall distances between all rectangles
+    in bounds. the diagonal is farthest, a rectangle has no distance to itself.
+    """
+    distances = gapSquared(bounds[:, None, :], bounds[None, :, :])
+    np.fill_diagonal(distances, farthest(distances.dtype))
+
+    return distances
+
+def rectangleGap(a, b):
+    """
+    return the exact wall to wall distance in between Rectangle a and Rectangle b,
+    0 if they touch or overlap
+    """
+    dx = max(0, b.x1 - a.x2, a.x1 - b.x2)
+    dy = max(0, b.y1 - a.y2, a.y1 - b.y2)
+
+    return hypot(dx, dy)
+
+def rectangleGaps(bound, bounds):
+    """
+    batched version of rectangleGap, return the wall to wall distances from
+    one [x1, y1, x2, y2] boundary towards every row of a (n, 4) boundary array
+    """
+    return np.sqrt(gapSquared(np.asarray(bound, dtype=float), bounds))
+
+def sweptEntry(bound, vector, otherBounds, distances):
+    """
+    return, for every row of otherBounds, the first t >= 0 at which the [x1, y1, x2, y2]
+    boundary moved by t * vector comes closer than distances to that rectangle:
+    inf if it never does, 0 if it already is. exact, no steps are taken.
+
+    seen from the displacement, the other rectangle grown by the moving one is a
+    box the displacement should stay distances away from. that region is the union
+    of the box grown along x, the box grown along y, and a circle at each corner.
+    """
+    vx, vy = float(vector[0]), float(vector[1])
+    d = np.asarray(distances, dtype=float)
+
+    # box of all displacements at which the two rectangles overlap
+    lowX  = otherBounds[:, X1] - bound[X2]
+    highX = otherBounds[:, X2] - bound[X1]
+    lowY  = otherBounds[:, Y1] - bound[Y2]
+    highY = otherBounds[:, Y2] - bound[Y1]
+
+    def slab(low, high, v):
+        # times at which the point t * v is strictly within (low, high)
+        if v == 0:
+            inside = (low < 0) & (0 < high)
+            return np.where(inside, -np.inf, np.inf), np.where(inside, np.inf, -np.inf)
+        t1, t2 = low / v, high / v
+        return np.minimum(t1, t2), np.maximum(t1, t2)
+
+    def box(lowX, highX, lowY, highY):
+        enterX, exitX = slab(lowX, highX, vx)
+        enterY, exitY = slab(lowY, highY, vy)
+        return np.maximum(enterX, enterY), np.minimum(exitX, exitY)
+
+    intervals = [box(lowX - d, highX + d, lowY, highY),
+                 box(lowX, highX, lowY - d, highY + d)]
+
+    # the corner circles, solve |t * v - c| = d
+    a = vx * vx + vy * vy
+    for cx in (lowX, highX):
+        for cy in (lowY, highY):
+            if a == 0:
+                inside = cx * cx + cy * cy < d * d
+                intervals.append((np.where(inside, -np.inf, np.inf), np.where(inside, np.inf, -np.inf)))
+                continue
+            b = vx * cx + vy * cy
+            disc = b * b - a * (cx * cx + cy * cy - d * d)
+            root = np.sqrt(np.maximum(disc, 0))
+            enter = np.where(disc > 0, (b - root) / a, np.inf)
+            exit = np.where(disc > 0, (b + root) / a, -np.inf)
+            intervals.append((enter, exit))
+
+    # the first moment within any of them, from t = 0 on
+    entry = np.full(len(otherBounds), np.inf)
+    for enter, exit in intervals:
+        enter = np.maximum(enter, 0)
+        entry = np.where(enter < exit, np.minimum(entry, enter), entry)
+
+    return entry
+
+def cornerDistances(selfBounds, otherBounds):
+    """
+    NOTE the old approximation of the distance in between houses, which is
+         sometimes too generous. use gapSquared instead.
+
+    return the squared distances from the rectangles in selfBounds towards the
+    rectangles in otherBounds, the two arrays are broadcasted against each other.
+    distances are measured exactly like Rectangle.getShortestDistance does it:
+
+    the upper right corner of self is compared with the 4 corners of the other
+    rectangle. if a corner of the other lies within the y range of self, only the
+    x distance counts, if it lies within the x range of self, only the y distance counts.
+
+    pairs that should be skipped (two identical rectangles) get an infinite distance.
+    """
+    selfX1 = selfBounds[..., X1]
+    selfY1 = selfBounds[..., Y1]
+    selfX2 = selfBounds[..., X2]
+    selfY2 = selfBounds[..., Y2]
+
+    # the four corners of every other rectangle
+    shortest = np.inf
+    for otherX in (otherBounds[..., X1], otherBounds[..., X2]):
+        for otherY in (otherBounds[..., Y1], otherBounds[..., Y2]):
+
+            # calculate distance to this corner using pythagoras, without the root
+            disx = (selfX2 - otherX) ** 2
+            disy = (selfY2 - otherY) ** 2
+            distance = np.where((selfY1 <= otherY) & (otherY <= selfY2), disx,
+                       np.where((selfX1 <= otherX) & (otherX <= selfX2), disy,
+                                disx + disy))
+
+            shortest = np.minimum(shortest, distance)
+
+    # skip a beat if the set of corners is the same as my own set
+    identical = (selfBounds == otherBounds).all(axis=-1)
+
+    return np.where(identical, np.inf, shortest)
+
+def cornerDistanceMatrix(bounds):
+    """
+    return a (n, n) matrix of squared corner distances between all rectangles in
+    bounds, see cornerDistances. the diagonal is infinite.
+    """
+    return cornerDistances(bounds[:, None, :], bounds[None, :, :])
@@ -16,13 +16,14 @@ import matplotlib.pyplot as plt
 import numpy as np
 import operator
 import json
+import hashlib
 import os
 
 from copy import copy
 from matplotlib.patches import Rectangle as mathplot_rectangle
 from random import randint, shuffle, random, randrange, choice, uniform
-from collections import Iterable
-from math import sqrt
+from collections import Iterable, namedtuple, OrderedDict
+from math import sqrt, hypot, floor, ceil, inf
 
 # determine if algorithms should use the orthodox or unortodox approach
 ORTHODOX = True
@@ -31,6 +32,10 @@ ORTHODOX = True
 AREA = (160, 180)
 HOUSE_COUNT = [20, 40, 60]
 
+# coordinates lie on a half meter grid. in integer coordinate mode they are
+# stored as whole ticks of this grid
+TICKS_PER_METER = 2
+
 # water constances
 WATER_PERCENTAGE  = 0.20         # percentage of total area covered by water
 MAX_BODIES        = 4            # maximum number of bodies
@@ -81,21 +86,89 @@ def moveCoord(coordinate, vector):
     return tuple(sum(x) for x in zip(coordinate, vector))
     # pick a random coord w
 
-def randomCoord(lowestCoord, highestCoord):
+def randomCoord(lowestCoord, highestCoord, ticks=False):
     """
-    pick a random coordinate,
+    pick a random coordinate, with 0.5 precision.
+    if ticks, the coordinate is returned in whole half meter ticks instead of meters
     """
     # pick a x value
-    random_x = round(uniform(lowestCoord[0], highestCoord[0]) * 2) / 2
+    random_x = round(uniform(lowestCoord[0], highestCoord[0]) * TICKS_PER_METER)
 
     # pick a y value
-    random_y = round(uniform(lowestCoord[1], highestCoord[1]) * 2) / 2
+    random_y = round(uniform(lowestCoord[1], highestCoord[1]) * TICKS_PER_METER)
+
+    if ticks:
+        return (random_x, random_y)
+    return (random_x / TICKS_PER_METER, random_y / TICKS_PER_METER)
+
+def toTicks(values):
+    """
+    turn (an array of) values in meters into int32 half meter ticks,
+    error if a value does not lie on the half meter grid
+    """
+    scaled = np.asarray(values, dtype=float) * TICKS_PER_METER
+    ticks = np.rint(scaled)
+    if not np.array_equal(scaled, ticks):
+        raise ValueError("toTicks: values do not lie on the half meter grid")
+
+    return ticks.astype(np.int32)
+
+def fromTicks(ticks):
+    """
+    turn (an array of) half meter ticks back into meters
+    """
+    return np.asarray(ticks) / TICKS_PER_METER
+
+# import vectorized kernels, classes depend upon them
+from dependencies.geometry import (farthest, boundaryArray, gapComponents, gapSquared, gapSquaredMatrix,
+                                   rectangleGap, rectangleGaps, sweptEntry, cornerDistances, cornerDistanceMatrix)
+
+# import the spatial index, houses and waterbodies keep it up to date
+from dependencies.spatial import SpatialGrid
+
+# import the struct of arrays, houses are views onto it
+from dependencies.state import MapState
 
-    return (random_x, random_y)
+# import the occupancy raster, houses and waterbodies keep it up to date as well
+from dependencies.raster import OccupancyRaster
+
+# import the water planner, addWater depends upon it
+from dependencies.water import WaterPlanner
+
+# import the edge index, used by rebuild
+from dependencies.edges import EdgeIndex
+
+# import the bottom left fill packer, used by rebuild
+from dependencies.packing import BottomLeftPacker
+
+# import the feasibility oracle, a checked and cached rebuild
+from dependencies.feasibility import FeasibilityOracle
+
+# import the sweep line validator of the map conditions
+from dependencies.validation import Violation, sweepViolations
 
 # import classes
 from dependencies.classes import HouseType, House, WaterBody, Rectangle, Map 
 
+# import the parallel rebuilder, its workers build maps of their own, so after the classes
+from dependencies.parallel import ParallelRebuilder
+
+# import the annealing engine, its moves work on maps, so after the classes as well
+from dependencies.annealing import (GeometricSchedule, ReheatingSchedule, BudgetSchedule,
+                                    TranslateMove, StepMove, SwapMove, RingMove, Annealer)
+
+# import the multi start runner, it rebuilds the best map of its workers
+from dependencies.multistart import MultiStartRunner
+
+# import the island model, parallel annealing with migration
+from dependencies.islands import IslandModel
+
+# import parallel tempering, replica exchange over worker processes
+from dependencies.tempering import ParallelTempering
+
+# import the population engine, batched evolutionary search over maps
+from dependencies.population import Population
+
 
 
 
@@ -268,3 +341,4 @@ def main_old2():
     map1.plot()
 
 
+"""
@@ -0,0 +1,174 @@
+
+"""
+NAME    islands.py
+
+AUTHOR  Jos Feenstra
+        Tara Elsen
+        Christiaan Wewer
+
+DESC    contains the classes:
+        - IslandModel
+
+NOTE    every island is a worker process which anneals a small population of
+        maps of its own. after every epoch, an island sends copies of its best
+        maps to the next island in the ring, and takes in the maps the island
+        before it sent, which replace its worst maps if they are better. good
+        structure found on one island so spreads over all of them.
+
+        maps migrate as Map.toArrays, the moves and schedule are copied into
+        every island once.
+
+"""
+# dependent upon the methods, constances and libaries in helpers
+from helpers import *
+
+import time
+import queue
+import traceback
+from random import seed
+from multiprocessing import Process, Queue
+
+def islandWorker(island, islandSeed, arrays, settings, inbox, outbox, results, deadline):
+    """
+    run one island, see runIsland, and put its result in results. if the
+    island fails, a dict with the island and the traceback under "error" is
+    put in results instead, so the main process does not wait for it forever
+    """
+    try:
+        results.put(runIsland(island, islandSeed, arrays, settings, inbox, outbox, deadline))
+    except Exception:
+        results.put({"island": island, "error": traceback.format_exc()})
+    finally:
+        # the next island may be done already, do not wait for it to read the last maps
+        outbox.cancel_join_thread()
+
+def runIsland(island, islandSeed, arrays, settings, inbox, outbox, deadline):
+    """
+    anneal a population of copies of the map in arrays for a number of epochs,
+    migrating the best maps in between. returns a dict with the best value, map
+    and the value curve of the island
+    """
+    seed(islandSeed)
+    np.random.seed(islandSeed % 2**32)
+
+    population = [Map.fromArrays(arrays) for k in range(settings["population"])]
+    annealers = [Annealer(aMap, settings["moves"], copy(settings["schedule"]), settings["weights"])
+                 for aMap in population]
+    values = [aMap.calculateValue() for aMap in population]
+    curve = []
+
+    for epoch in range(settings["epochs"]):
+        if deadline is not None and time.time() > deadline:
+            break
+
+        # anneal every map for one epoch, the schedules go on where they were
+        values = [annealer.run(settings["epochSteps"], reset=(epoch == 0)) for annealer in annealers]
+
+        # send the best maps to the next island
+        for k in np.argsort(values)[::-1][:settings["migrants"]].tolist():
+            outbox.put((values[k], population[k].toArrays()))
+
+        # take in the maps of the island before, they replace the worst maps if better
+        while True:
+            try:
+                value, migrant = inbox.get_nowait()
+            except queue.Empty:
+                break
+            worst = int(np.argmin(values))
+            if value > values[worst]:
+                population[worst] = Map.fromArrays(migrant)
+                annealers[worst] = Annealer(population[worst], settings["moves"],
+                                            annealers[worst].schedule, settings["weights"])
+                values[worst] = value
+
+        curve.append(max(values))
+
+    best = int(np.argmax(values))
+    return {"island" : island,
+            "seed"   : islandSeed,
+            "value"  : values[best],
+            "map"    : population[best].toArrays(),
+            "curve"  : curve}
+
+################################################################################
+
+class IslandModel(object):
+    """
+    island model annealing over worker processes, connected in a ring.
+
+    Methods:
+    run(aMap, epochs, seconds, firstSeed)   # anneal on all islands, returns (best map, results of every island)
+    """
+    # seconds in between checks on the workers, while waiting for their results
+    POLL = 1.0
+
+    def __init__(self, moves, schedule, weights=None, islands=None, population=2,
+                 migrants=1, epochSteps=2000):
+        self.moves = moves
+        self.schedule = schedule
+        self.weights = weights
+        self.islands = islands if islands is not None else os.cpu_count()
+        self.population = population
+        self.migrants = migrants
+        self.epochSteps = epochSteps
+
+    def run(self, aMap, epochs, seconds=None, firstSeed=0):
+        """
+        start every island with copies of aMap, and anneal for epochs epochs of
+        epochSteps steps, or until seconds have passed. island k is seeded
+        with firstSeed + k. returns the best map, and the results of all islands
+        """
+        deadline = None if seconds is None else time.time() + seconds
+        settings = {"moves": self.moves, "schedule": self.schedule, "weights": self.weights,
+                    "population": self.population, "migrants": self.migrants,
+                    "epochs": epochs, "epochSteps": self.epochSteps}
+        arrays = aMap.toArrays()
+
+        # island k sends to island k + 1
+        queues = [Queue() for k in range(self.islands)]
+        results = Queue()
+        workers = [Process(target=islandWorker,
+                           args=(k, firstSeed + k, arrays, settings, queues[k],
+                                 queues[(k + 1) % self.islands], results, deadline))
+                   for k in range(self.islands)]
+        for worker in workers:
+            worker.start()
+
+        # read the results before joining, a worker can not exit with unread results
+        islandResults = []
+        while len(islandResults) < self.islands:
+            try:
+                result = results.get(timeout=self.POLL)
+            except queue.Empty:
+                # a worker which died without a word never sends its result
+                dead = [k for k, worker in enumerate(workers) if worker.exitcode not in (None, 0)]
+                if dead:
+                    self.terminate(workers)
+                    raise RuntimeError("IslandModel: island {} exited with code {}".format(
+                        dead[0], workers[dead[0]].exitcode))
+                continue
+
+            if "error" in result:
+                self.terminate(workers)
+                raise RuntimeError("IslandModel: island {} failed\n{}".format(result["island"], result["error"]))
+            islandResults.append(result)
+
+        islandResults.sort(key=lambda result: result["island"])
+        for worker in workers:
+            worker.join()
+
+        best = max(islandResults, key=lambda result: result["value"])
+
+        return Map.fromArrays(best["map"]), islandResults
+
+    def terminate(self, workers):
+        """
+        stop all workers, after one of them failed the others can wait forever for migrants
+        """
+        for worker in workers:
+            if worker.is_alive():
+                worker.terminate()
+        for worker in workers:
+            worker.join()
+
+################################################################################
@@ -0,0 +1,77 @@
+
+"""
+NAME    multistart.py
+
+AUTHOR  Jos Feenstra
+        Tara Elsen
+        Christiaan Wewer
+
+DESC    contains the classes:
+        - MultiStartRunner
+
+NOTE    restarts of a random algorithm are independent, so they can run in
+        separate processes. a pipeline is a function pipeline(deadline) at
+        module level, which builds and improves a map, and returns it together
+        with its value curve. every start runs it with its own seed, so a run
+        without a deadline can be repeated start by start.
+
+        maps travel back to the main process as Map.toArrays.
+
+"""
+# dependent upon the methods, constances and libaries in helpers
+from helpers import *
+
+import time
+from random import seed
+from concurrent.futures import ProcessPoolExecutor
+
+def multiStartWorker(pipeline, startSeed, deadline):
+    """
+    run pipeline once, seeded with startSeed. returns a dict with the seed,
+    the value, the map arrays and the value curve of the start
+    """
+    seed(startSeed)
+    np.random.seed(startSeed % 2**32)
+
+    start = time.time()
+    aMap, curve = pipeline(deadline)
+
+    return {"seed"    : startSeed,
+            "value"   : aMap.calculateValue(),
+            "map"     : aMap.toArrays(),
+            "curve"   : list(curve),
+            "seconds" : time.time() - start}
+
+################################################################################
+
+class MultiStartRunner(object):
+    """
+    runs a number of seeded starts of a pipeline over a pool of worker
+    processes, and keeps the best map of all of them.
+
+    Methods:
+    run(pipeline, starts, seconds, firstSeed)   # all starts, returns (best map, results of every start)
+    """
+    def __init__(self, workers=None):
+        self.workers = workers if workers is not None else os.cpu_count()
+
+    def run(self, pipeline, starts, seconds=None, firstSeed=0):
+        """
+        run starts seeded copies of pipeline, with the seeds firstSeed, firstSeed + 1, ..
+        all starts share one wall clock deadline, seconds from now (None is no deadline).
+        returns the best map, and the results of all starts ordered by seed.
+        only without a deadline, a run can be repeated exactly with the same seeds
+        """
+        deadline = None if seconds is None else time.time() + seconds
+
+        with ProcessPoolExecutor(self.workers) as executor:
+            futures = [executor.submit(multiStartWorker, pipeline, firstSeed + k, deadline)
+                       for k in range(starts)]
+            results = [future.result() for future in futures]
+
+        # the first start wins a tie, so the best map only depends on the results
+        best = max(results, key=lambda result: result["value"])
+
+        return Map.fromArrays(best["map"]), results
+
+################################################################################
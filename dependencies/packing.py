@@ -0,0 +1,98 @@
+
+"""
+NAME    packing.py
+
+AUTHOR  Jos Feenstra
+        Tara Elsen
+        Christiaan Wewer
+
+DESC    contains the classes:
+        - BottomLeftPacker
+
+NOTE    rings may overlap each other, like in Map.rebuild. two houses fit next
+        to each other if the gap in between them is at least the largest of their
+        ring widths, along the x or the y axis. this is exactly the same as
+        demanding that no house lies within the ring of the other.
+
+"""
+# dependent upon the methods, constances and libaries in helpers
+from helpers import *
+
+################################################################################
+
+class BottomLeftPacker(object):
+    """
+    deterministic bottom left fill packer for houses with rings. the houses
+    are placed largest ring footprint first, each at the lowest, then leftmost
+    position where it fits.
+
+    the lowest position of a house is either its lower bound, or just far enough
+    above a placed house. the same goes for the leftmost position, so only
+    those coordinates are tried.
+
+    Methods:
+    pack(sizes, rings, lower, upper)        # origins of all houses, or None if they do not fit
+    getOrder(sizes, rings)                  # the order in which the houses are placed
+    """
+    def getOrder(self, sizes, rings):
+        """
+        return the house indices, largest footprint of house and ring first
+        """
+        footprint = (sizes[:, 0] + 2 * rings) * (sizes[:, 1] + 2 * rings)
+        return np.argsort(-footprint, kind="stable")
+
+    def pack(self, sizes, rings, lower, upper):
+        """
+        return an (n, 2) array with an origin for every house, or None if the houses do not fit.
+
+        sizes   (n, 2) width and height of every house
+        rings   (n,) ring width of every house
+        lower   (n, 2) lowest origin of every house (its mandatory ring within the map)
+        upper   (n, 2) highest origin of every house
+        """
+        sizes, rings = np.asarray(sizes, dtype=float), np.asarray(rings, dtype=float)
+        lower, upper = np.asarray(lower, dtype=float), np.asarray(upper, dtype=float)
+
+        origins = np.zeros((len(sizes), 2))
+        placed = []
+        for k in self.getOrder(sizes, rings):
+            origin = self.findPosition(sizes[k], rings[k], lower[k], upper[k],
+                                       origins[placed], sizes[placed], rings[placed])
+            if origin is None:
+                return None
+
+            origins[k] = origin
+            placed.append(k)
+
+        return origins
+
+    def findPosition(self, size, ring, lower, upper, origins, sizes, rings):
+        """
+        return the lowest, then leftmost origin at which a house of size and
+        ring fits in between the placed houses, or None
+        """
+        # the distance to keep from every placed house
+        distance = np.maximum(ring, rings)
+        x1, y1 = origins[:, 0], origins[:, 1]
+        x2, y2 = x1 + sizes[:, 0], y1 + sizes[:, 1]
+
+        # candidate coordinates, against a bound or just next to a placed house
+        xs = np.unique(np.concatenate(([lower[0]], x2 + distance)))
+        ys = np.unique(np.concatenate(([lower[1]], y2 + distance)))
+        xs = xs[(lower[0] <= xs) & (xs <= upper[0])]
+        ys = ys[(lower[1] <= ys) & (ys <= upper[1])]
+
+        for y in ys:
+
+            # the houses next to this row of candidates
+            near = (y < y2 + distance) & (y1 < y + size[1] + distance)
+
+            # gap along x to every near house, for every candidate x at once
+            gap = np.maximum(xs[:, None] - x2[near], x1[near] - (xs[:, None] + size[0]))
+            fits = (gap >= distance[near]).all(axis=1)
+            if fits.any():
+                return (float(xs[np.argmax(fits)]), float(y))
+
+        return None
+
+################################################################################
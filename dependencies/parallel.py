@@ -0,0 +1,116 @@
+
+"""
+NAME    parallel.py
+
+AUTHOR  Jos Feenstra
+        Tara Elsen
+        Christiaan Wewer
+
+DESC    contains the classes:
+        - ParallelRebuilder
+
+NOTE    the random tries of Map.rebuild are independent of each other, so
+        every worker process runs its own share of them on a copy of the map,
+        with its own seed. the first worker to find a valid layout wins, and
+        the others stop at their next chunk of tries.
+
+        only the house types and ring counts are shipped to the workers, they
+        build their own house types and map out of the constants in helpers.
+
+"""
+# dependent upon the methods, constances and libaries in helpers
+from helpers import *
+
+from random import seed
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from multiprocessing import Manager
+
+def rebuildWorker(mapData, workerSeed, attempts, chunk, RUNTIME_LIMIT_HOUSE, cancel):
+    """
+    run up to attempts random rebuild tries on a copy of the map, in chunks,
+    until one succeeds or cancel is set. returns (tries, origins), origins is
+    None if no try succeeded
+    """
+    coord1, coord2, integer, houseData = mapData
+    seed(workerSeed)
+    np.random.seed(workerSeed % 2**32)
+
+    # the map copy, positions do not matter, the rebuild moves every house
+    houseTypes = {ht.integer: ht for ht in initHouseTypes()}
+    aMap = Map(coord1, coord2, integer)
+    for typeInteger, addRings in houseData:
+        aMap.addHouse(houseTypes[typeInteger], (0,0), addRings)
+
+    tries = 0
+    while tries < attempts and not cancel.is_set():
+        n = min(chunk, attempts - tries)
+        mapIterations = aMap.rebuildRandom(n, RUNTIME_LIMIT_HOUSE)
+        if mapIterations > -1:
+            return tries + mapIterations, [house.origin for house in aMap.house]
+        tries += n
+
+    return tries, None
+
+################################################################################
+
+class ParallelRebuilder(object):
+    """
+    rebuilds maps like Map.rebuild, but spreads the random tries over a pool
+    of worker processes. the pool is kept alive in between rebuilds, call
+    close() (or use a with statement) when done.
+
+    Methods:
+    rebuild(aMap, RUNTIME_LIMIT_MAP, RUNTIME_LIMIT_HOUSE)    # like Map.rebuild, the first valid layout of any worker wins
+    close()                                                 # stop the worker processes
+    """
+    # number of tries a worker runs in between looking at the cancel flag
+    CHUNK = 10
+
+    def __init__(self, workers=None):
+        self.workers = workers if workers is not None else os.cpu_count()
+        self.executor = ProcessPoolExecutor(self.workers)
+        self.manager = Manager()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def rebuild(self, aMap, RUNTIME_LIMIT_MAP, RUNTIME_LIMIT_HOUSE):
+        """
+        rebuild aMap, returns the number of map tries it took all workers
+        together, or -1 if none of them found a valid layout
+        """
+        # the packer is deterministic, no use in running it more than once
+        if aMap.packRings():
+            return 1
+
+        mapData = (aMap.coord1, aMap.coord2, aMap.integer,
+                   [(house.type.integer, house.addRings) for house in aMap.house])
+        cancel = self.manager.Event()
+        share = -(-RUNTIME_LIMIT_MAP // self.workers)
+        pending = {self.executor.submit(rebuildWorker, mapData, randrange(2**63), share,
+                                        self.CHUNK, RUNTIME_LIMIT_HOUSE, cancel)
+                   for worker in range(self.workers)}
+
+        # wait for the first valid layout, the others stop at their next chunk
+        mapIterations = 0
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                tries, origins = future.result()
+                mapIterations += tries
+                if origins is not None:
+                    cancel.set()
+                    aMap.setOrigins(aMap.house, np.array(origins, dtype=float))
+                    return mapIterations
+
+        print("map.rebuild Runtime Error")
+        return -1
+
+    def close(self):
+        self.executor.shutdown()
+        self.manager.shutdown()
+
+################################################################################
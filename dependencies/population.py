@@ -0,0 +1,396 @@
+
+"""
+NAME    population.py
+
+AUTHOR  Jos Feenstra
+        Tara Elsen
+        Christiaan Wewer
+
+DESC    contains the classes:
+        - Population
+
+NOTE    a population holds P maps with the houses, types and water of one
+        template map as arrays: origins (P, n, 2) and rings (P, n), which give
+        a (P, n, 4) boundary tensor. the whole population is scored at once,
+        the same way Map.calculateValue scores a single map.
+
+        a map which breaks the map conditions after crossover or mutation is
+        repaired: the houses which collide are taken out, and put back at the
+        nearest free origin the occupancy raster knows of. rings are shrunk
+        until they touch no other house, so every individual is a correct map.
+
+"""
+# dependent upon the methods, constances and libaries in helpers
+from helpers import *
+
+import time
+
+################################################################################
+
+class Population(object):
+    """
+    evolutionary search over a population of maps, scored in batches.
+
+    Methods:
+    evaluate(origins, rings)                # values of a batch of maps, -1 for an incorrect map
+    scatter()                               # random correct maps for all but the first individual
+    select(count, tournament)               # tournament selection, returns indices
+    crossover(first, second, rate)          # children inheriting the houses of a region from first
+    mutate(origins, rings)                  # a translate, swap or ring change per map
+    repair(origins, rings)                  # relocate colliding houses and shrink rings
+    evolve(generations, seconds)            # evolve, returns the best value
+    getMap(k)                               # individual k as a Map
+    getBest()                               # the best individual as a Map
+    getStats()                              # generations, evaluations and evaluations per second of the last run
+    """
+    # maps scored at once, bounds the memory of the (chunk, n, n) distance tensor
+    CHUNK = 256
+
+    # half the side of the first window repair looks for a free origin in, in ticks
+    WINDOW = 16
+
+    def __init__(self, template, size, estimate=False, weights=(6, 2, 1), maxStep=8):
+        self.template = template
+        self.arrays = template.toArrays()
+        self.size = size
+        self.maxStep = maxStep
+
+        # score calculateValueEstimate instead of calculateValue, rings matter then
+        self.estimate = estimate
+
+        # chances of the translate, swap and ring mutation
+        self.weights = np.array(weights, dtype=float) / sum(weights)
+
+        # per house slot, the slots of a type never change
+        self.types = [house.type for house in template.house]
+        self.typeIds = self.arrays["typeIds"]
+        self.sizes = np.array([(ht.width, ht.height) for ht in self.types], dtype=float).reshape(-1, 2)
+        self.lower = np.array([(ht.xLower, ht.yLower) for ht in self.types], dtype=float).reshape(-1, 2)
+        self.upper = np.array([(ht.xUpper, ht.yUpper) for ht in self.types], dtype=float).reshape(-1, 2)
+        self.typeArrays = template.getTypeArrays()
+        self.baseRing = self.typeArrays[0]
+        self.slots = {integer: np.flatnonzero(self.typeIds == integer) for integer in np.unique(self.typeIds).tolist()}
+        self.waterBounds = boundaryArray([water.boundary for water in template.waterBody])
+
+        # the collision index of repair, the water stays, houses come and go by slot
+        self.raster = OccupancyRaster(template.coord1, template.coord2)
+        for water in template.waterBody:
+            self.raster.update(water, [("water", water.boundary)])
+        self.tokens = [object() for house in template.house]
+
+        # every individual starts as a copy of the template
+        self.origins = np.repeat(self.arrays["origins"][None], size, axis=0)
+        self.rings = np.repeat(self.arrays["rings"][None], size, axis=0)
+        self.values = self.evaluate(self.origins, self.rings)
+
+        self.generations = 0
+        self.evaluations = 0
+        self.relocations = 0
+        self.seconds = 0.0
+        self.curve = []
+
+    def getBounds(self, origins):
+        """
+        return the (P, n, 4) boundary tensor of a batch of (P, n, 2) origins
+        """
+        return np.concatenate((origins, origins + self.sizes), axis=-1)
+
+    def evaluate(self, origins, rings):
+        """
+        return the values of a batch of maps as an int array, in one vectorized
+        call per CHUNK maps. a map which breaks its mandatory rings is worth -1
+        """
+        n = origins.shape[1]
+        values = np.empty(len(origins), dtype=np.int64)
+        for start in range(0, len(origins), self.CHUNK):
+            bounds = self.template.measure(self.getBounds(origins[start:start + self.CHUNK]))
+
+            # shortest distance of every house towards all other houses, of every map
+            distances = gapSquared(bounds[:, :, None, :], bounds[:, None, :, :])
+            distances[:, np.arange(n), np.arange(n)] = farthest(distances.dtype)
+            values[start:start + self.CHUNK] = self.template.valuesFromShortest(distances.min(axis=2),
+                                                                                self.typeArrays)
+
+        # the estimate counts the rings, as long as the map is correct
+        if self.estimate:
+            values = np.where(values < 0, -1, HouseType.valueForRings(self.typeIds, rings).sum(axis=1))
+
+        return values
+
+    def getClearance(self, origins):
+        """
+        return the (P, n, n) clearance in between all houses of a batch of maps:
+        the largest ring width one house can have without touching the other
+        """
+        n = origins.shape[1]
+        bounds = self.getBounds(origins)
+        dx, dy = gapComponents(bounds[:, :, None, :], bounds[:, None, :, :])
+        clearance = np.maximum(dx, dy)
+        clearance[:, np.arange(n), np.arange(n)] = inf
+
+        return clearance
+
+    def isWet(self, origins):
+        """
+        return a (P, n) mask of the houses which lie within a body of water
+        """
+        if not len(self.waterBounds):
+            return np.zeros(origins.shape[:2], dtype=bool)
+        bounds = self.getBounds(origins)[:, :, None, :]
+        water = self.waterBounds[None, None, :, :]
+
+        # [x1, y1, x2, y2], the interiors should overlap on both axes
+        return ((bounds[..., 0] < water[..., 2]) & (water[..., 0] < bounds[..., 2]) &
+                (bounds[..., 1] < water[..., 3]) & (water[..., 1] < bounds[..., 3])).any(axis=2)
+
+    def getFootprints(self, i, origin):
+        """
+        return the raster footprints of the house in slot i at origin, with its mandatory ring
+        """
+        (x, y), (width, height), base = origin, self.sizes[i].tolist(), int(self.baseRing[i])
+
+        return [("house", Rectangle((x, y), width, height)),
+                ("ring", Rectangle((x - base, y - base), width + 2 * base, height + 2 * base))]
+
+    def nearestFreeOrigin(self, i, wanted):
+        """
+        return the origin closest to wanted, at which the house in slot i and
+        its mandatory ring touch no other house, ring or water in the raster.
+        None if there is no such origin. the search starts in a small window
+        around wanted, which doubles until it holds an origin as close as its edge
+        """
+        (width, height), base = self.sizes[i].tolist(), int(self.baseRing[i])
+        coord1 = self.template.coord1
+        ticks = base * TICKS_PER_METER
+
+        # the cells of the origins within the bounds of the house type, and of wanted
+        low  = [int(ceil((self.lower[i][axis] - coord1[axis]) * TICKS_PER_METER)) for axis in (0, 1)]
+        high = [int(floor((self.upper[i][axis] - coord1[axis]) * TICKS_PER_METER)) + 1 for axis in (0, 1)]
+        centre = [int(round((wanted[axis] - coord1[axis]) * TICKS_PER_METER)) for axis in (0, 1)]
+
+        radius = self.WINDOW
+        while True:
+            i1, j1 = max(centre[0] - radius, low[0]), max(centre[1] - radius, low[1])
+            i2, j2 = min(centre[0] + radius + 1, high[0]), min(centre[1] + radius + 1, high[1])
+            whole = (i1, j1, i2, j2) == (low[0], low[1], high[0], high[1])
+
+            # the body should be free of rings and water, the mandatory ring free of
+            # houses, the grown rectangle lies base meters to the lower left of its body
+            body = self.raster.freeOriginsWithin(width, height, (i1, j1, i2, j2), ("ring", "water"))
+            grown = self.raster.freeOriginsWithin(width + 2 * base, height + 2 * base,
+                                                  (i1 - ticks, j1 - ticks, i2 - ticks, j2 - ticks), ("house",))
+            cells = np.argwhere(body & grown) + (i1, j1)
+
+            # a free cell within the radius is the closest one, there can be no closer one outside
+            if len(cells):
+                squared = ((cells - centre) ** 2).sum(axis=1)
+                k = int(np.argmin(squared))
+                if whole or squared[k] <= radius * radius:
+                    return fromTicks(cells[k]) + coord1
+            if whole:
+                return None
+            radius *= 2
+
+    def repairMap(self, origins, touching, wet):
+        """
+        repair one map in place: the houses in water, and the houses with the
+        most collisions, are taken out until no collisions are left, and are put
+        back at the nearest free origin one by one. returns false if one did not fit
+        """
+        touching = touching.copy()
+        moved = np.flatnonzero(wet).tolist()
+        touching[moved, :] = False
+        touching[:, moved] = False
+
+        counts = touching.sum(axis=1)
+        while counts.any():
+            i = int(np.argmax(counts))
+            moved.append(i)
+            touching[i, :] = False
+            touching[:, i] = False
+            counts = touching.sum(axis=1)
+
+        # the houses which stay are the obstacles
+        for i, token in enumerate(self.tokens):
+            if i in moved:
+                self.raster.remove(token)
+            else:
+                self.raster.update(token, self.getFootprints(i, origins[i].tolist()))
+
+        for i in moved:
+            origin = self.nearestFreeOrigin(i, origins[i])
+            if origin is None:
+                return False
+            origins[i] = origin
+            self.raster.update(self.tokens[i], self.getFootprints(i, origin.tolist()))
+            self.relocations += 1
+
+        return True
+
+    def repair(self, origins, rings):
+        """
+        repair a batch of maps in place, so they meet all map conditions.
+        returns a mask of the maps which could not be repaired
+        """
+        failed = np.zeros(len(origins), dtype=bool)
+        for start in range(0, len(origins), self.CHUNK):
+            chunk = slice(start, start + self.CHUNK)
+
+            # a house may not lie within the mandatory ring of another house, or the other way around
+            clearance = self.getClearance(origins[chunk])
+            touching = clearance < np.maximum(self.baseRing[:, None], self.baseRing[None, :])
+            wet = self.isWet(origins[chunk])
+
+            for k in np.flatnonzero(touching.any(axis=(1, 2)) | wet.any(axis=1)).tolist():
+                failed[start + k] = not self.repairMap(origins[start + k], touching[k], wet[k])
+
+            # shrink every ring to the largest one which touches no other house
+            fitting = np.floor(self.getClearance(origins[chunk]).min(axis=2)) - self.baseRing
+            rings[chunk] = np.minimum(rings[chunk], np.maximum(fitting, 0)).astype(np.int64)
+
+        return failed
+
+    def scatter(self):
+        """
+        replace all individuals but the first by random correct maps: every
+        house gets a random origin within its bounds, which repair then fixes
+        """
+        count = self.size - 1
+        ticks = np.random.randint(toTicks(self.lower), toTicks(self.upper) + 1,
+                                  size=(count,) + self.lower.shape)
+        origins = fromTicks(ticks)
+        rings = np.zeros((count, len(self.types)), dtype=np.int64)
+
+        failed = self.repair(origins, rings)
+        values = self.evaluate(origins, rings)
+        values[failed] = -1
+        self.origins[1:], self.rings[1:], self.values[1:] = origins, rings, values
+
+    def select(self, count, tournament=3):
+        """
+        return the indices of count individuals, each the best of tournament random ones
+        """
+        contenders = np.random.randint(self.size, size=(count, tournament))
+        winners = np.argmax(self.values[contenders], axis=1)
+
+        return contenders[np.arange(count), winners]
+
+    def crossover(self, first, second, rate=0.7):
+        """
+        return the origins and rings of children of the individuals in first
+        and second. a child takes the houses of first which lie on one side of
+        a random line, and the houses of second on the other side, type by type.
+        if a side holds too many houses of a type, the rest come from the other
+        side. with chance 1 - rate, a child is a copy of first
+        """
+        origins = self.origins[first].copy()
+        rings = self.rings[first].copy()
+        coord1, coord2 = self.template.coord1, self.template.coord2
+
+        for c, (a, b) in enumerate(zip(first.tolist(), second.tolist())):
+            if random() >= rate:
+                continue
+
+            # a random half of the map, of which the houses come from a
+            axis = randrange(2)
+            cut = uniform(coord1[axis], coord2[axis])
+            side = choice((1, -1))
+            inA = side * (self.origins[a, :, axis] + self.sizes[:, axis] / 2 - cut) < 0
+            inB = side * (self.origins[b, :, axis] + self.sizes[:, axis] / 2 - cut) < 0
+
+            for slots in self.slots.values():
+                sources = [(a, slots[inA[slots]]), (b, slots[~inB[slots]]),
+                           (b, slots[inB[slots]]), (a, slots[~inA[slots]])]
+                inherited = np.concatenate([self.origins[parent, taken] for parent, taken in sources])
+                inheritedRings = np.concatenate([self.rings[parent, taken] for parent, taken in sources])
+                origins[c, slots] = inherited[:len(slots)]
+                rings[c, slots] = inheritedRings[:len(slots)]
+
+        return origins, rings
+
+    def mutate(self, origins, rings):
+        """
+        mutate a batch of maps in place, one mutation per map: a random house
+        is translated, swaps origins with a house of a different type, or gets
+        one ring more or less
+        """
+        n = origins.shape[1]
+        ticks = int(self.maxStep * TICKS_PER_METER)
+        kinds = np.random.choice(len(self.weights), size=len(origins), p=self.weights)
+
+        for c, kind in enumerate(kinds.tolist()):
+            i = randrange(n)
+            if kind == 0:
+                offset = np.random.randint(-ticks, ticks + 1, size=2) / TICKS_PER_METER
+                origins[c, i] = np.clip(origins[c, i] + offset, self.lower[i], self.upper[i])
+            elif kind == 1:
+                others = np.flatnonzero(self.typeIds != self.typeIds[i])
+                if not len(others):
+                    continue
+                j = int(others[randrange(len(others))])
+
+                # both houses should stay within the bounds of their type
+                if (np.all((self.lower[i] <= origins[c, j]) & (origins[c, j] <= self.upper[i])) and
+                        np.all((self.lower[j] <= origins[c, i]) & (origins[c, i] <= self.upper[j]))):
+                    origins[c, [i, j]] = origins[c, [j, i]]
+            else:
+                rings[c, i] = max(rings[c, i] + choice((-1, 1)), 0)
+
+    def evolve(self, generations, seconds=None, tournament=3, crossoverRate=0.7):
+        """
+        evolve for generations generations, or until seconds have passed. every
+        generation breeds as many children as there are individuals, and the
+        best of parents and children survive. returns the best value
+        """
+        start = time.time()
+        self.generations = 0
+        self.evaluations = 0
+        self.relocations = 0
+        self.curve = []
+
+        for generation in range(generations):
+            if seconds is not None and time.time() - start > seconds:
+                break
+
+            # breed
+            origins, rings = self.crossover(self.select(self.size, tournament),
+                                            self.select(self.size, tournament), crossoverRate)
+            self.mutate(origins, rings)
+            failed = self.repair(origins, rings)
+            values = self.evaluate(origins, rings)
+            values[failed] = -1
+
+            # the best of parents and children survive, parents win a tie
+            values = np.concatenate((self.values, values))
+            survivors = np.argsort(-values, kind="stable")[:self.size]
+            self.origins = np.concatenate((self.origins, origins))[survivors]
+            self.rings = np.concatenate((self.rings, rings))[survivors]
+            self.values = values[survivors]
+
+            self.generations += 1
+            self.evaluations += len(origins)
+            self.curve.append(int(self.values[0]))
+
+        self.seconds = time.time() - start
+
+        return int(self.values.max())
+
+    def getMap(self, k):
+        """
+        return individual k as a Map, with the water of the template
+        """
+        arrays = dict(self.arrays, origins=self.origins[k].copy(), rings=self.rings[k].copy())
+
+        return Map.fromArrays(arrays, set(self.types))
+
+    def getBest(self):
+        return self.getMap(int(np.argmax(self.values)))
+
+    def getStats(self):
+        return {"generations": self.generations,
+                "evaluations": self.evaluations,
+                "relocations": self.relocations,
+                "seconds": self.seconds,
+                "evaluationsPerSecond": self.evaluations / max(self.seconds, 1e-9)}
+
+################################################################################
@@ -0,0 +1,299 @@
+
+"""
+NAME    raster.py
+
+AUTHOR  Jos Feenstra
+        Tara Elsen
+        Christiaan Wewer
+
+DESC    contains the classes:
+        - OccupancyRaster
+
+NOTE    the raster has a cell for every half meter tick of the map. rectangles
+        which do not lie on the half meter grid (water) are rounded outwards,
+        so the raster can say a spot is taken while it is just free, but never
+        the other way around.
+
+"""
+# dependent upon the methods, constances and libaries in helpers
+from helpers import *
+
+################################################################################
+
+class OccupancyRaster(object):
+    """
+    half meter occupancy raster of a map, with a summed area table (integral
+    image) per combination of layers. cells hold counts, so items can overlap
+    and still be removed again one by one.
+
+    Layers:
+    house       the bodies of houses
+    ring        the ringboundaries of houses, bodies included
+    water       the bodies of water
+
+    Methods:
+    update(item, footprints)                # item covers [(layer, rectangle), ..] now
+    remove(item)                            # forget about item
+    countOccupied(rectangle, layers)        # number of occupied cells within rectangle
+    isFree(rectangle, layers)               # true if no cell within rectangle is occupied
+    freeOrigins(width, height, layers)      # mask of all cells where a width x height rectangle is free
+    freeOriginsWithin(width, height, cells, layers) # the same mask, for a range of cells only
+    emptyRectangles(layers)                 # all maximal empty rectangles, as cell ranges
+    clear()                                 # forget about all items
+    """
+    LAYERS = ("house", "ring", "water")
+
+    # paints an integral image is patched for in between two queries, after
+    # that it is dropped, and built again at the next query
+    PATCH_LIMIT = 16
+
+    def __init__(self, coord1=(0,0), coord2=AREA):
+
+        self.coord1 = coord1
+        self.coord2 = coord2
+        self.shape  = (int(ceil((coord2[0] - coord1[0]) * TICKS_PER_METER)),
+                       int(ceil((coord2[1] - coord1[1]) * TICKS_PER_METER)))
+
+        # cell counts per layer, indexed [x, y]
+        self.counts = {layer: np.zeros(self.shape, dtype=np.int32) for layer in self.LAYERS}
+
+        # id -> (item, [(layer, cells), ..]), and the integral images, built on
+        # demand and patched on every paint, see PATCH_LIMIT
+        self.items = {}
+        self.integrals = {}
+        self.patches = {}
+
+    def __len__(self):
+        return len(self.items)
+
+    def __contains__(self, item):
+        return id(item) in self.items
+
+    def getCells(self, rectangle):
+        """
+        return the cell range (i1, j1, i2, j2) covered by rectangle, rounded outwards.
+        the range is not clipped to the raster
+        """
+        return (int(floor((rectangle.x1 - self.coord1[0]) * TICKS_PER_METER)),
+                int(floor((rectangle.y1 - self.coord1[1]) * TICKS_PER_METER)),
+                int(ceil((rectangle.x2 - self.coord1[0]) * TICKS_PER_METER)),
+                int(ceil((rectangle.y2 - self.coord1[1]) * TICKS_PER_METER)))
+
+    def clip(self, cells):
+        i1, j1, i2, j2 = cells
+        return (min(max(i1, 0), self.shape[0]), min(max(j1, 0), self.shape[1]),
+                min(max(i2, 0), self.shape[0]), min(max(j2, 0), self.shape[1]))
+
+    def getOccupied(self, layers, cells):
+        """
+        return a boolean array of the cells within the (clipped) cell range
+        which are occupied in any of layers
+        """
+        i1, j1, i2, j2 = cells
+        occupied = np.zeros((i2 - i1, j2 - j1), dtype=bool)
+        for layer in layers:
+            occupied |= self.counts[layer][i1:i2, j1:j2] > 0
+
+        return occupied
+
+    def paint(self, layer, cells, amount):
+        """
+        add amount to the cells of layer, and patch the integral images which
+        depend on it, instead of building them again at the next query
+        """
+        cells = self.clip(cells)
+        i1, j1, i2, j2 = cells
+        if i1 >= i2 or j1 >= j2:
+            return
+
+        # the occupancy of the cached integrals with this layer, before painting
+        patched = [layers for layers in self.integrals if layer in layers]
+        before = [self.getOccupied(layers, cells) for layers in patched]
+
+        self.counts[layer][i1:i2, j1:j2] += amount
+
+        for layers, occupied in zip(patched, before):
+
+            # many paints in between two queries, building it again is cheaper then
+            if self.patches[layers] >= self.PATCH_LIMIT:
+                del self.integrals[layers]
+                continue
+            self.patches[layers] += 1
+
+            # only cells which became free or occupied change the integral
+            change = self.getOccupied(layers, cells).astype(np.int64) - occupied
+            if not change.any():
+                continue
+
+            # the change of every entry to the lower right of the range, the
+            # entries past the range take the sums of its last row and column
+            C = change.cumsum(axis=0).cumsum(axis=1)
+            S = self.integrals[layers]
+            S[i1 + 1:i2 + 1, j1 + 1:j2 + 1] += C
+            S[i1 + 1:i2 + 1, j2 + 1:] += C[:, -1:]
+            S[i2 + 1:, j1 + 1:j2 + 1] += C[-1:, :]
+            S[i2 + 1:, j2 + 1:] += C[-1, -1]
+
+    def update(self, item, footprints):
+        """
+        let item cover the (layer, rectangle) pairs of footprints, replacing
+        whatever it covered before. only the cells of the item are touched.
+        """
+        new = [(layer, self.getCells(rectangle)) for layer, rectangle in footprints]
+
+        # nothing to do if the item did not move
+        if id(item) in self.items:
+            if self.items[id(item)][1] == new:
+                return
+            self.remove(item)
+
+        for layer, cells in new:
+            self.paint(layer, cells, 1)
+        self.items[id(item)] = (item, new)
+
+    def remove(self, item):
+
+        # quit if item is unknown
+        if id(item) not in self.items:
+            return
+
+        item, footprints = self.items.pop(id(item))
+        for layer, cells in footprints:
+            self.paint(layer, cells, -1)
+
+    def getIntegral(self, layers):
+        """
+        return the summed area table of the cells occupied in any of layers,
+        padded with a row and column of zeros
+        """
+        layers = tuple(layers)
+        if layers not in self.integrals:
+            occupied = np.zeros(self.shape, dtype=bool)
+            for layer in layers:
+                occupied |= self.counts[layer] > 0
+
+            integral = np.zeros((self.shape[0] + 1, self.shape[1] + 1), dtype=np.int64)
+            integral[1:, 1:] = occupied.cumsum(axis=0).cumsum(axis=1)
+            self.integrals[layers] = integral
+
+        # patches since the last query
+        self.patches[layers] = 0
+
+        return self.integrals[layers]
+
+    def countOccupied(self, rectangle, layers=LAYERS):
+        """
+        return the number of occupied cells within rectangle, in four lookups.
+        cells outside of the map count as occupied
+        """
+        cells = self.getCells(rectangle)
+        i1, j1, i2, j2 = self.clip(cells)
+        outside = (cells[2] - cells[0]) * (cells[3] - cells[1]) - (i2 - i1) * (j2 - j1)
+
+        integral = self.getIntegral(layers)
+        inside = integral[i2, j2] - integral[i1, j2] - integral[i2, j1] + integral[i1, j1]
+
+        return int(inside) + outside
+
+    def isFree(self, rectangle, layers=LAYERS):
+        """
+        return true if rectangle lies within the map, and covers no occupied cell
+        """
+        return self.countOccupied(rectangle, layers) == 0
+
+    def freeOrigins(self, width, height, layers=LAYERS):
+        """
+        return a boolean mask, indexed [i, j], which is true if a rectangle of
+        width x height with its origin at cell (i, j) covers no occupied cell.
+        the rectangle has to lie within the map, so the mask is smaller than the raster
+        """
+        w = int(ceil(width * TICKS_PER_METER))
+        h = int(ceil(height * TICKS_PER_METER))
+        if w > self.shape[0] or h > self.shape[1]:
+            return np.zeros((0, 0), dtype=bool)
+
+        # the box sum of every possible origin at once
+        S = self.getIntegral(layers)
+        occupied = S[w:, h:] - S[:-w, h:] - S[w:, :-h] + S[:-w, :-h]
+
+        return occupied == 0
+
+    def freeOriginsWithin(self, width, height, cells, layers=LAYERS):
+        """
+        return the part of the freeOrigins mask of the origins within the cell
+        range (i1, j1, i2, j2), indexed from (i1, j1). only the cells the
+        rectangles can cover are summed, so a small range is cheap.
+        the rectangles of the range have to lie within the map
+        """
+        w = int(ceil(width * TICKS_PER_METER))
+        h = int(ceil(height * TICKS_PER_METER))
+        i1, j1, i2, j2 = cells
+
+        occupied = np.zeros((i2 - i1 + w - 1, j2 - j1 + h - 1), dtype=bool)
+        for layer in layers:
+            occupied |= self.counts[layer][i1:i2 + w - 1, j1:j2 + h - 1] > 0
+
+        # a local summed area table, padded like getIntegral
+        S = np.zeros((occupied.shape[0] + 1, occupied.shape[1] + 1), dtype=np.int64)
+        S[1:, 1:] = occupied.cumsum(axis=0).cumsum(axis=1)
+        occupied = S[w:, h:] - S[:-w, h:] - S[w:, :-h] + S[:-w, :-h]
+
+        return occupied == 0
+
+    def getFreeMask(self, layers=LAYERS):
+        """
+        return a boolean array, true for every cell not occupied in any of layers
+        """
+        free = np.ones(self.shape, dtype=bool)
+        for layer in layers:
+            free &= self.counts[layer] == 0
+
+        return free
+
+    def emptyRectangles(self, layers=LAYERS, free=None):
+        """
+        return an (m, 4) int array of the maximal empty rectangles (i, j, width, height)
+        in cells. every empty rectangle of the map lies within at least one of them,
+        so the largest empty rectangle of any shape can be found among them.
+
+        for every row, the free cells below it form a histogram, whose largest
+        rectangles are found with a stack in one sweep over the row. those which
+        could still grow into the next row are not maximal, and left out.
+        """
+        if free is None:
+            free = self.getFreeMask(layers)
+
+        found = []
+        heights = np.zeros(self.shape[0], dtype=np.int64)
+        for j in range(self.shape[1]):
+            heights = np.where(free[:, j], heights + 1, 0)
+            row = heights.tolist() + [0]
+
+            # stack of (start column, height), with increasing heights
+            stack = []
+            for i, height in enumerate(row):
+                start = i
+                while stack and stack[-1][1] >= height:
+                    start, top = stack.pop()
+                    if top > height:
+                        found.append((start, j - top + 1, i - start, top))
+                if height and (not stack or stack[-1][1] < height):
+                    stack.append((start, height))
+
+        found = np.array(found, dtype=np.int64).reshape(-1, 4)
+
+        # free cells of the row above every rectangle, within its range
+        rowSums = np.zeros((self.shape[0] + 1, self.shape[1] + 1), dtype=np.int64)
+        rowSums[1:, :-1] = free.cumsum(axis=0)
+        i, j, width, height = found.T
+        growing = rowSums[i + width, j + height] - rowSums[i, j + height] == width
+
+        return found[~growing]
+
+    def clear(self):
+        for counts in self.counts.values():
+            counts[:] = 0
+        self.items = {}
+        self.integrals.clear()
+
+################################################################################
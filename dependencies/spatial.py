@@ -0,0 +1,167 @@
+
+"""
+NAME    spatial.py
+
+AUTHOR  Jos Feenstra
+        Tara Elsen
+        Christiaan Wewer
+
+DESC    contains the spatial index classes:
+        - SpatialGrid
+
+NOTE    the index only returns candidates, the exact collision test is still
+        done by the Rectangle methods. this way the index can never be wrong,
+        only slow when the cells are sized badly.
+
+"""
+# dependent upon the methods, constances and libaries in helpers
+from helpers import *
+
+################################################################################
+
+class SpatialGrid(object):
+    """
+    uniform bucket grid, which remembers per cell which items cover it.
+
+    Methods:
+    insert(item, rectangle)                 # register item, covering rectangle
+    update(item, rectangle)                 # item moved, covering rectangle now
+    remove(item)                            # forget about item
+    query(rectangle, margin)                # all items covering the cells of rectangle (+ margin)
+    nearest(rectangle, getRectangle)        # the item closest to rectangle, and its distance
+    resize(cellSize)                        # rehash all items into cells of a new size
+    """
+    def __init__(self, cellSize=None):
+
+        # the cell size grows to the largest footprint inserted, if not given
+        self.cellSize = cellSize
+
+        # cell key -> {id: item} and id -> (item, rectangle, cell keys)
+        self.cells = {}
+        self.items = {}
+
+    def __len__(self):
+        return len(self.items)
+
+    def __contains__(self, item):
+        return id(item) in self.items
+
+    def getCellKeys(self, rectangle, margin=0):
+        """
+        return the keys of all cells covered by rectangle, expanded by margin
+        """
+        size = self.cellSize
+        xLow  = int(floor((rectangle.x1 - margin) / size))
+        xHigh = int(floor((rectangle.x2 + margin) / size))
+        yLow  = int(floor((rectangle.y1 - margin) / size))
+        yHigh = int(floor((rectangle.y2 + margin) / size))
+
+        return [(x, y) for x in range(xLow, xHigh + 1)
+                       for y in range(yLow, yHigh + 1)]
+
+    def insert(self, item, rectangle):
+
+        # cells should be about as large as the largest footprint
+        footprint = max(rectangle.width, rectangle.height)
+        if self.cellSize is None or footprint > self.cellSize:
+            self.resize(footprint)
+
+        keys = self.getCellKeys(rectangle)
+        for key in keys:
+            self.cells.setdefault(key, {})[id(item)] = item
+        self.items[id(item)] = (item, rectangle, keys)
+
+    def remove(self, item):
+
+        # quit if item is unknown
+        if id(item) not in self.items:
+            return
+
+        item, rectangle, keys = self.items.pop(id(item))
+        for key in keys:
+            cell = self.cells[key]
+            del cell[id(item)]
+            if not cell:
+                del self.cells[key]
+
+    def update(self, item, rectangle):
+
+        # unknown items are inserted
+        if id(item) not in self.items:
+            self.insert(item, rectangle)
+            return
+
+        # only touch the cells if the item moved into other cells
+        keys = self.getCellKeys(rectangle)
+        if keys == self.items[id(item)][2]:
+            self.items[id(item)] = (item, rectangle, keys)
+        else:
+            self.remove(item)
+            self.insert(item, rectangle)
+
+    def query(self, rectangle, margin=0):
+        """
+        return all items covering a cell which is covered by rectangle
+        """
+        # nothing is inserted yet
+        if self.cellSize is None:
+            return []
+
+        found = {}
+        for key in self.getCellKeys(rectangle, margin):
+            cell = self.cells.get(key)
+            if cell:
+                found.update(cell)
+
+        return list(found.values())
+
+    def nearest(self, rectangle, getRectangle, exclude=None):
+        """
+        return (item, distance) of the item closest to rectangle, measured from
+        wall to wall. getRectangle(item) gives the rectangle to measure to, it
+        should lie within the rectangle the item was inserted with.
+        return (None, inf) if there is no other item.
+        """
+        best, bestDistance = None, inf
+        if self.cellSize is None:
+            return best, bestDistance
+
+        # search an increasing square of cells around rectangle
+        seen = set() if exclude is None else {id(exclude)}
+        margin = 0
+        while len(seen) < len(self.items):
+            for item in self.query(rectangle, margin):
+                if id(item) in seen:
+                    continue
+                seen.add(id(item))
+
+                distance = rectangleGap(rectangle, getRectangle(item))
+                if distance < bestDistance:
+                    best, bestDistance = item, distance
+
+            # items outside of the searched square are further away than margin
+            if bestDistance <= margin:
+                break
+            margin += self.cellSize
+
+        return best, bestDistance
+
+    def resize(self, cellSize):
+        """
+        rehash all items into cells of size cellSize
+        """
+        items = [(item, rectangle) for item, rectangle, keys in self.items.values()]
+        self.cellSize = cellSize
+        self.cells = {}
+        self.items = {}
+        for item, rectangle in items:
+            keys = self.getCellKeys(rectangle)
+            for key in keys:
+                self.cells.setdefault(key, {})[id(item)] = item
+            self.items[id(item)] = (item, rectangle, keys)
+
+    def clear(self):
+        self.cells = {}
+        self.items = {}
+
+################################################################################
@@ -0,0 +1,158 @@
+
+"""
+NAME    state.py
+
+AUTHOR  Jos Feenstra
+        Tara Elsen
+        Christiaan Wewer
+
+DESC    contains the classes:
+        - MapState
+
+NOTE    a MapState stores the geometric data of houses as a struct of arrays,
+        one row per house. House objects are thin views onto these rows, so
+        algorithms can keep on using house.origin and house.boundary, while the
+        evaluation reads (and may write) the arrays directly.
+
+        in integer coordinate mode the state also keeps the boundaries as int32
+        half meter ticks, so the evaluation can compare exact squared integers.
+
+"""
+# dependent upon the methods, constances and libaries in helpers
+from helpers import *
+
+################################################################################
+
+class MapState(object):
+    """
+    struct of arrays, holding per house row:
+    origin      (x, y) of the house
+    size        (width, height) of the house type
+    typeId      integer of the house type
+    rings       number of additional rings
+    baseRing    mandatory ring width of the house type
+    ringValue   value per meter of additional free space
+    value       value of the house itself
+    bounds      [x1, y1, x2, y2] of the house            (derived)
+    ringBounds  [x1, y1, x2, y2] of the ring of the house (derived)
+    tickBounds  bounds in half meter ticks, int32             (derived, integer mode only)
+
+    Methods:
+    addRow(houseType, origin, addRings)     # add a house, returns its row
+    write(row, origin, addRings)            # change a house, and update its derived data
+    setOrigins(rows, origins)               # move a whole set of houses at once
+    setRings(rows, addRings)                # change the rings of a whole set of houses at once
+    """
+    def __init__(self, capacity=8, integer=False):
+
+        self.count = 0
+        self.integer = integer
+
+        # raw data
+        self.origin    = np.zeros((capacity, 2))
+        self.size      = np.zeros((capacity, 2))
+        self.typeId    = np.zeros(capacity, dtype=np.int64)
+        self.rings     = np.zeros(capacity, dtype=np.int64)
+        self.baseRing  = np.zeros(capacity, dtype=np.int64)
+        self.ringValue = np.zeros(capacity, dtype=np.int64)
+        self.value     = np.zeros(capacity, dtype=np.int64)
+
+        # derived data
+        self.bounds     = np.zeros((capacity, 4))
+        self.ringBounds = np.zeros((capacity, 4))
+        if integer:
+            self.tickBounds = np.zeros((capacity, 4), dtype=np.int32)
+
+        # views check the version of their row to see if they are outdated,
+        # the origin version changes whenever any house moves
+        self.rowVersion    = np.zeros(capacity, dtype=np.int64)
+        self.originVersion = 0
+
+    def grow(self):
+        """
+        double the capacity of all arrays
+        """
+        names = ["origin", "size", "typeId", "rings", "baseRing", "ringValue",
+                 "value", "bounds", "ringBounds", "rowVersion"]
+        if self.integer:
+            names.append("tickBounds")
+
+        for name in names:
+            old = getattr(self, name)
+            new = np.zeros((2 * len(old),) + old.shape[1:], dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def addRow(self, houseType, origin, addRings):
+
+        if self.count == len(self.origin):
+            self.grow()
+        row = self.count
+        self.count += 1
+
+        # copy type data, so the evaluation does not need the type objects
+        self.size[row]      = (houseType.width, houseType.height)
+        self.typeId[row]    = houseType.integer
+        self.baseRing[row]  = houseType.baseRing
+        self.ringValue[row] = houseType.ringValue
+        self.value[row]     = houseType.value
+
+        self.write(row, origin, addRings)
+        return row
+
+    def write(self, row, origin=None, addRings=None):
+        """
+        change the origin and / or rings of row, and update its derived data
+        """
+        if origin is not None:
+            self.origin[row] = origin
+            self.originVersion += 1
+        if addRings is not None:
+            self.rings[row] = addRings
+
+        # house boundary
+        x, y = self.origin[row]
+        width, height = self.size[row]
+        self.bounds[row] = (x, y, x + width, y + height)
+
+        # ring boundary, the ring width of ring[addRings] is baseRing + addRings
+        ringWidth = self.baseRing[row] + self.rings[row]
+        self.ringBounds[row] = (x - ringWidth, y - ringWidth,
+                                x + width + ringWidth, y + height + ringWidth)
+        if self.integer:
+            self.tickBounds[row] = toTicks(self.bounds[row])
+
+        self.rowVersion[row] += 1
+
+    def setOrigins(self, rows, origins):
+        """
+        vectorized write, move the houses of |rows| to |origins| at once
+        """
+        rows = np.asarray(rows, dtype=np.intp)
+        origins = np.asarray(origins, dtype=float).reshape(-1, 2)
+        ringWidth = (self.baseRing[rows] + self.rings[rows])[:, None]
+
+        self.origin[rows] = origins
+        self.bounds[rows] = np.hstack((origins, origins + self.size[rows]))
+        self.ringBounds[rows] = np.hstack((origins - ringWidth,
+                                           origins + self.size[rows] + ringWidth))
+        if self.integer:
+            self.tickBounds[rows] = toTicks(self.bounds[rows])
+
+        self.rowVersion[rows] += 1
+        self.originVersion += 1
+
+    def setRings(self, rows, addRings):
+        """
+        vectorized write, change the additional rings of |rows| at once
+        """
+        rows = np.asarray(rows, dtype=np.intp)
+        self.rings[rows] = addRings
+        ringWidth = (self.baseRing[rows] + self.rings[rows])[:, None]
+
+        self.ringBounds[rows] = np.hstack((self.origin[rows] - ringWidth,
+                                           self.origin[rows] + self.size[rows] + ringWidth))
+
+        self.rowVersion[rows] += 1
+
+################################################################################
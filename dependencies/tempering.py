@@ -0,0 +1,190 @@
+
+"""
+NAME    tempering.py
+
+AUTHOR  Jos Feenstra
+        Tara Elsen
+        Christiaan Wewer
+
+DESC    contains the classes:
+        - ParallelTempering
+
+NOTE    replica exchange: every replica is a map in a worker process of its
+        own, annealing at a fixed temperature of a ladder. in between rounds,
+        replicas at adjacent temperatures swap with chance
+
+            min(1, exp((1 / T_low - 1 / T_high) * (value_high - value_low)))
+
+        so a good map found at a high temperature sinks down the ladder, and a
+        stuck map at a low temperature gets to climb out of its local optimum.
+        instead of sending the maps back and forth, the replicas swap temperatures.
+
+"""
+# dependent upon the methods, constances and libaries in helpers
+from helpers import *
+
+import time
+import traceback
+from math import exp
+from random import seed
+from multiprocessing import Process, Pipe
+
+def replicaWorker(replica, replicaSeed, arrays, moves, weights, connection):
+    """
+    run one replica, see runReplica. if the replica fails, a dict with the
+    replica and the traceback under "error" is sent instead of its answer
+    """
+    try:
+        runReplica(replica, replicaSeed, arrays, moves, weights, connection)
+    except Exception:
+        connection.send({"replica": replica, "error": traceback.format_exc()})
+    finally:
+        connection.close()
+
+def runReplica(replica, replicaSeed, arrays, moves, weights, connection):
+    """
+    anneal a copy of the map in arrays at the (temperature, steps) received over
+    connection, answering with (value, steps, seconds) of every round. None
+    ends the work, the best map found is sent back then
+    """
+    seed(replicaSeed)
+    np.random.seed(replicaSeed % 2**32)
+
+    aMap = Map.fromArrays(arrays)
+    annealer = Annealer(aMap, moves, GeometricSchedule(1.0), weights)
+    best, bestState = aMap.calculateValue(), annealer.snapshot()
+
+    while True:
+        command = connection.recv()
+        if command is None:
+            break
+
+        # a fixed temperature, the walk goes on from where it was
+        temperature, steps = command
+        annealer.schedule = GeometricSchedule(temperature, 1.0, temperature)
+        annealer.run(steps, restore=False)
+        if annealer.best > best:
+            best, bestState = annealer.best, annealer.bestState
+
+        connection.send((annealer.value, annealer.steps, annealer.seconds))
+
+    annealer.restore(bestState)
+    connection.send({"replica": replica, "seed": replicaSeed, "value": best, "map": aMap.toArrays()})
+
+################################################################################
+
+class ParallelTempering(object):
+    """
+    replica exchange over worker processes, one replica per temperature.
+
+    Methods:
+    run(aMap, rounds, seconds, firstSeed)   # returns (best map, results of every replica)
+    getStats()                              # swap acceptance per pair of adjacent temperatures, steps per second per replica, of the last run
+    """
+    def __init__(self, moves, temperatures, weights=None, exchangeSteps=500):
+        self.moves = moves
+        self.weights = weights
+        self.exchangeSteps = exchangeSteps
+
+        # coldest first
+        self.temperatures = sorted(temperatures)
+        self.resetStats()
+
+    def resetStats(self):
+        self.swapAttempts = np.zeros(len(self.temperatures) - 1, dtype=np.int64)
+        self.swapAccepted = np.zeros(len(self.temperatures) - 1, dtype=np.int64)
+        self.replicaSteps = np.zeros(len(self.temperatures), dtype=np.int64)
+        self.replicaSeconds = np.zeros(len(self.temperatures))
+
+    def run(self, aMap, rounds, seconds=None, firstSeed=0):
+        """
+        anneal copies of aMap on every rung of the ladder for rounds rounds of
+        exchangeSteps steps, or until seconds have passed. replica k is seeded
+        with firstSeed + k. returns the best map, and the results of all replicas
+        """
+        deadline = None if seconds is None else time.time() + seconds
+        arrays = aMap.toArrays()
+        count = len(self.temperatures)
+        self.resetStats()
+
+        connections = []
+        workers = []
+        for k in range(count):
+            ours, theirs = Pipe()
+            connections.append(ours)
+            workers.append(Process(target=replicaWorker,
+                                   args=(k, firstSeed + k, arrays, self.moves, self.weights, theirs)))
+            workers[-1].start()
+
+            # only the worker holds its end, so recv notices when it dies
+            theirs.close()
+
+        # ladder[k] is the replica at temperature k
+        ladder = list(range(count))
+        values = np.zeros(count)
+        for exchange in range(rounds):
+            if deadline is not None and time.time() > deadline:
+                break
+
+            # one round of annealing, all replicas at once
+            for k, replica in enumerate(ladder):
+                connections[replica].send((self.temperatures[k], self.exchangeSteps))
+            for replica in range(count):
+                values[replica], steps, spent = self.receive(connections, workers, replica)
+                self.replicaSteps[replica] += steps
+                self.replicaSeconds[replica] += spent
+
+            # swap adjacent temperatures, even pairs and odd pairs in turns
+            for k in range(exchange % 2, count - 1, 2):
+                low, high = ladder[k], ladder[k + 1]
+                chance = (1 / self.temperatures[k] - 1 / self.temperatures[k + 1]) * (values[high] - values[low])
+                self.swapAttempts[k] += 1
+                if chance >= 0 or random() < exp(chance):
+                    ladder[k], ladder[k + 1] = high, low
+                    self.swapAccepted[k] += 1
+
+        # the best map of every replica
+        for connection in connections:
+            connection.send(None)
+        results = [self.receive(connections, workers, replica) for replica in range(count)]
+        for worker in workers:
+            worker.join()
+
+        best = max(results, key=lambda result: result["value"])
+
+        return Map.fromArrays(best["map"]), results
+
+    def receive(self, connections, workers, replica):
+        """
+        return the next answer of a replica. if the replica failed or died, all
+        workers are stopped and a RuntimeError is raised
+        """
+        try:
+            answer = connections[replica].recv()
+        except EOFError:
+            workers[replica].join()
+            self.terminate(workers)
+            raise RuntimeError("ParallelTempering: replica {} exited with code {}".format(
+                replica, workers[replica].exitcode))
+
+        if isinstance(answer, dict) and "error" in answer:
+            self.terminate(workers)
+            raise RuntimeError("ParallelTempering: replica {} failed\n{}".format(replica, answer["error"]))
+
+        return answer
+
+    def terminate(self, workers):
+        """
+        stop all workers, after one of them failed the others wait forever for their next round
+        """
+        for worker in workers:
+            if worker.is_alive():
+                worker.terminate()
+        for worker in workers:
+            worker.join()
+
+    def getStats(self):
+        return {"swapAcceptance": (self.swapAccepted / np.maximum(self.swapAttempts, 1)).tolist(),
+                "stepsPerSecond": (self.replicaSteps / np.maximum(self.replicaSeconds, 1e-9)).tolist()}
+
+################################################################################
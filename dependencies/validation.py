@@ -0,0 +1,90 @@
+
+"""
+NAME    validation.py
+
+AUTHOR  Jos Feenstra
+        Tara Elsen
+        Christiaan Wewer
+
+DESC    contains the sort and sweep validator of the map conditions:
+        - Violation
+        - sweepViolations
+
+NOTE    two rectangles overlap if they share some area, touching walls are
+        fine. the sweep sorts all rectangles on x1 once, and only compares a
+        rectangle with the rectangles it overlaps on the x axis, which makes
+        checking a map after every accepted move affordable.
+
+"""
+# dependent upon the methods, constances and libaries in helpers
+from helpers import *
+
+# a broken map condition, pair holds the two objects involved (the second is
+# None for the within conditions), kind is one of:
+# houseTouch    a house lies within the ring of another house
+# houseWater    a house lies within a body of water
+# waterTouch    two bodies of water overlap
+# houseWithin   the mandatory ring of a house is not within the map
+# waterWithin   a body of water is not within the map
+Violation = namedtuple("Violation", ["pair", "kind"])
+
+# roles of the rectangles in the sweep
+HOUSE, RING, WATER = 0, 1, 2
+
+# the kind of violation for an overlapping pair of roles, other pairs are allowed
+KINDS = {(HOUSE, RING): "houseTouch", (RING, HOUSE): "houseTouch",
+         (HOUSE, WATER): "houseWater", (WATER, HOUSE): "houseWater",
+         (WATER, WATER): "waterTouch"}
+
+def sweepViolations(bounds, ringBounds, baseRing, waterBounds, mapBounds):
+    """
+    return a list of (i, j, kind) of all broken map conditions, i and j are
+    house indices, or water indices for waterTouch. for houseWater i is the
+    house and j the water, for the within conditions j is None.
+
+    bounds and ringBounds are the (n, 4) house and ring boundary arrays,
+    baseRing the (n,) mandatory ring widths, waterBounds the (m, 4) water
+    boundary array, mapBounds [x1, y1, x2, y2].
+    """
+    violations = []
+    x1, y1, x2, y2 = mapBounds
+
+    # everything should be within the map, houses with their mandatory ring
+    # (additional rings may stick out, like Map.calculateValue ignores the edge)
+    baseRing = np.asarray(baseRing)
+    outside = ((bounds[:, 0] - baseRing < x1) | (bounds[:, 1] - baseRing < y1) |
+               (bounds[:, 2] + baseRing > x2) | (bounds[:, 3] + baseRing > y2))
+    violations.extend((int(i), None, "houseWithin") for i in np.flatnonzero(outside))
+    outside = ((waterBounds[:, 0] < x1) | (waterBounds[:, 1] < y1) |
+               (waterBounds[:, 2] > x2) | (waterBounds[:, 3] > y2))
+    violations.extend((int(i), None, "waterWithin") for i in np.flatnonzero(outside))
+
+    # all rectangles, with their role and owner
+    rectangles = np.concatenate((bounds, ringBounds, waterBounds)).reshape(-1, 4)
+    roles  = [HOUSE] * len(bounds) + [RING] * len(ringBounds) + [WATER] * len(waterBounds)
+    owners = list(range(len(bounds))) * 2 + list(range(len(waterBounds)))
+
+    # sweep over x, keeping the rectangles whose x range is still open
+    active = []
+    for k in np.argsort(rectangles[:, 0], kind="stable").tolist():
+        ax1, ay1, ax2, ay2 = rectangles[k].tolist()
+        active = [other for other in active if other[3] > ax1]
+
+        for l, oy1, oy2, ox2 in active:
+            kind = KINDS.get((roles[l], roles[k]))
+            if kind is None or not (oy1 < ay2 and ay1 < oy2):
+                continue
+
+            # the ring of a house always contains its own house
+            if kind == "houseTouch" and owners[l] == owners[k]:
+                continue
+
+            # report houses first
+            i, j = (l, k) if roles[l] == HOUSE else (k, l)
+            if kind == "waterTouch":
+                i, j = min(l, k), max(l, k)
+            violations.append((owners[i], owners[j], kind))
+
+        active.append((k, ay1, ay2, ax2))
+
+    return violations
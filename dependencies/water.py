@@ -0,0 +1,222 @@
+
+"""
+NAME    water.py
+
+AUTHOR  Jos Feenstra
+        Tara Elsen
+        Christiaan Wewer
+
+DESC    contains the classes:
+        - WaterPlanner
+
+NOTE    water may lie on top of the rings of houses, but every cell of ring
+        covered by water is space a house cannot grow into anymore. the planner
+        first tries to fit the water in the space no ring uses, and only if that
+        fails searches the packing which covers the least ring cells.
+
+        plans are cached per free space signature, so asking again for the
+        water of a map which did not change (or changed back) costs a lookup.
+
+"""
+# dependent upon the methods, constances and libaries in helpers
+from helpers import *
+
+################################################################################
+
+class WaterPlanner(object):
+    """
+    plans up to MAX_BODIES water bodies, as (i, j, width, height) cell ranges
+    of an OccupancyRaster, which hold at least a given number of cells and
+    satisfy RATIO_UPPER_BOUND.
+
+    Methods:
+    plan(cellsNeeded)                       # the bodies with the least ring cells lost, or None
+    packFree(cellsNeeded)                   # greedy: largest bodies in the space without rings, or None
+    search(cellsNeeded)                     # branch and bound over the best candidate bodies, or None
+    trim(width, height, cellsNeeded)        # smallest body within width x height holding cellsNeeded
+    """
+    # plans per free space signature, shared by all maps
+    cache = OrderedDict()
+    CACHE_SIZE = 256
+
+    # number of candidate bodies the branch and bound chooses from
+    CANDIDATES = 40
+
+    def __init__(self, raster):
+        self.raster = raster
+
+        # cells water can not lie on, and cells of ring space it would take
+        self.blocked = ~raster.getFreeMask(("house", "water"))
+        self.ring = ~raster.getFreeMask(("ring",)) & ~self.blocked
+
+        # summed area table of the ring cells, padded with zeros
+        self.ringIntegral = np.zeros((self.ring.shape[0] + 1, self.ring.shape[1] + 1), dtype=np.int64)
+        self.ringIntegral[1:, 1:] = self.ring.cumsum(axis=0).cumsum(axis=1)
+
+    def getSignature(self, cellsNeeded):
+        digest = hashlib.sha1(np.packbits(self.blocked).tobytes())
+        digest.update(np.packbits(self.ring).tobytes())
+
+        return (cellsNeeded, self.ring.shape, digest.digest())
+
+    def plan(self, cellsNeeded):
+        """
+        return the list of bodies which covers the least ring cells, or None if
+        the water does not fit. results are cached per free space signature.
+        """
+        key = self.getSignature(cellsNeeded)
+        if key in WaterPlanner.cache:
+            WaterPlanner.cache.move_to_end(key)
+            return WaterPlanner.cache[key]
+
+        # fitting the water without touching any ring costs nothing, so it cant be beaten
+        bodies = self.packFree(cellsNeeded)
+        if bodies is None:
+            bodies = self.search(cellsNeeded)
+
+        WaterPlanner.cache[key] = bodies
+        if len(WaterPlanner.cache) > WaterPlanner.CACHE_SIZE:
+            WaterPlanner.cache.popitem(last=False)
+
+        return bodies
+
+    def ringCells(self, i, j, width, height):
+        """
+        return the number of ring cells covered by the bodies (arrays allowed)
+        """
+        S = self.ringIntegral
+        return S[i + width, j + height] - S[i, j + height] - S[i + width, j] + S[i, j]
+
+    def packFree(self, cellsNeeded, ignoreRings=False):
+        """
+        greedy: repeatedly take the largest body within the ratio bounds out
+        of the empty rectangles of the space without houses, rings and water.
+        """
+        free = ~self.blocked if ignoreRings else ~self.blocked & ~self.ring
+        bodies = []
+        while cellsNeeded > 0 and len(bodies) < MAX_BODIES:
+
+            # fail fast if there is not enough free space left
+            if free.sum() < cellsNeeded:
+                return None
+
+            # the largest body each empty rectangle can hold within the ratio bounds
+            rectangles = self.raster.emptyRectangles(free=free)
+            if not len(rectangles):
+                return None
+            i, j, width, height = rectangles.T
+            width  = np.minimum(width, RATIO_UPPER_BOUND * height)
+            height = np.minimum(height, RATIO_UPPER_BOUND * width)
+
+            # pick the largest, first one in case of a tie
+            best = int(np.argmax(width * height))
+            body = (int(i[best]), int(j[best])) + self.trim(width[best], height[best], cellsNeeded)
+
+            # claim the cells
+            free[body[0]:body[0] + body[2], body[1]:body[1] + body[3]] = False
+            cellsNeeded -= body[2] * body[3]
+            bodies.append(body)
+
+        if cellsNeeded > 0:
+            return None
+        return bodies
+
+    def getCandidates(self):
+        """
+        return the candidate bodies as an (m, 5) array of (i, j, width, height, ring cells),
+        the largest body of every empty rectangle, put in each of its 4 corners.
+        only the CANDIDATES bodies with the most cells outside of ring space are kept
+        """
+        rectangles = self.raster.emptyRectangles(free=~self.blocked)
+        if not len(rectangles):
+            return np.zeros((0, 5), dtype=np.int64)
+        i, j, width, height = rectangles.T
+        w = np.minimum(width, RATIO_UPPER_BOUND * height)
+        h = np.minimum(height, RATIO_UPPER_BOUND * width)
+
+        # the 4 corners of the empty rectangles
+        candidates = []
+        for ci, cj in ((i, j), (i + width - w, j), (i, j + height - h), (i + width - w, j + height - h)):
+            candidates.append(np.stack((ci, cj, w, h, self.ringCells(ci, cj, w, h)), axis=1))
+        candidates = np.unique(np.concatenate(candidates), axis=0)
+
+        # best cells outside of ring space first, then the largest
+        order = np.lexsort((-candidates[:, 2] * candidates[:, 3],
+                            candidates[:, 4] - candidates[:, 2] * candidates[:, 3]))
+        candidates = candidates[order[:self.CANDIDATES]]
+
+        # the search wants the largest bodies first
+        return candidates[np.argsort(-candidates[:, 2] * candidates[:, 3], kind="stable")]
+
+    def search(self, cellsNeeded):
+        """
+        branch and bound: choose up to MAX_BODIES non overlapping candidates which
+        hold cellsNeeded cells, covering as few ring cells as possible. the last
+        body chosen is trimmed to the cells still needed.
+        """
+        candidates = self.getCandidates().tolist()
+        areas = [c[2] * c[3] for c in candidates]
+        best = [(inf, inf), None]
+
+        # the greedy packing on top of the rings is the first plan to beat
+        bodies = self.packFree(cellsNeeded, ignoreRings=True)
+        if bodies is not None:
+            total = int(sum(self.ringCells(*body) for body in bodies))
+            best = [(total, sum(w * h for i, j, w, h in bodies) - cellsNeeded), bodies]
+
+        def overlaps(a, b):
+            return (a[0] < b[0] + b[2] and b[0] < a[0] + a[2] and
+                    a[1] < b[1] + b[3] and b[1] < a[1] + a[3])
+
+        def branch(start, chosen, cost, needed):
+
+            # bound: ring cells only add up, and the next bodies are the largest left
+            if cost >= best[0][0]:
+                return
+            if sum(areas[start:start + MAX_BODIES - len(chosen)]) < needed:
+                return
+
+            for k in range(start, len(candidates)):
+                i, j, width, height, ringCells = candidates[k]
+                if any(overlaps(candidates[k], other) for other in chosen):
+                    continue
+
+                # this body finishes the plan, trim it to what is needed
+                if areas[k] >= needed:
+                    w, h = self.trim(width, height, needed)
+                    total = cost + int(self.ringCells(i, j, w, h))
+                    if (total, w * h - needed) < best[0]:
+                        best[0] = (total, w * h - needed)
+                        best[1] = [tuple(c[:4]) for c in chosen] + [(i, j, w, h)]
+                    continue
+
+                if len(chosen) + 1 < MAX_BODIES:
+                    branch(k + 1, chosen + [candidates[k]], cost + ringCells, needed - areas[k])
+
+        branch(0, [], 0, cellsNeeded)
+
+        return best[1]
+
+    @staticmethod
+    def trim(width, height, cellsNeeded):
+        """
+        return the (width, height) in cells of the smallest body within width x
+        height and the ratio bounds, which holds at least cellsNeeded cells.
+        returns width, height if the rectangle is too small to hold them all.
+        """
+        if width * height <= cellsNeeded:
+            return int(width), int(height)
+
+        best = (int(width), int(height))
+        for h in range(1, int(height) + 1):
+            w = max(-(-cellsNeeded // h), int(ceil(h / RATIO_UPPER_BOUND)))
+            if w > width or w > RATIO_UPPER_BOUND * h or h > RATIO_UPPER_BOUND * w:
+                continue
+
+            # least overshoot first, the squarest body second
+            if (w * h, abs(w - h)) < (best[0] * best[1], abs(best[0] - best[1])):
+                best = (w, h)
+
+        return best
+
+################################################################################